@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Global deadline in seconds for one fan-out across all sources
+DEFAULT_DEADLINE = 20.0
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='fetch')
+
+
+class SourceResult(namedtuple('SourceResult', ['name', 'status', 'data', 'elapsed', 'error'])):
+    """Outcome of fetching one source: status is 'ok', 'error' or 'timeout'"""
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.status == 'ok'
+
+    def as_dict(self):
+        return {
+            'status': self.status,
+            'count': len(self.data),
+            'elapsed_ms': round(self.elapsed * 1000, 1),
+            'error': self.error,
+        }
+
+
+def _timed(fetch):
+    start = time.perf_counter()
+    try:
+        return fetch(), time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, e
+
+
+def fetch_all(fetchers, deadline=DEFAULT_DEADLINE):
+    """Call every fetcher concurrently and collect what finishes in time.
+
+    ``fetchers`` maps a source name to a zero-argument callable. Sources that
+    raise or miss the deadline come back with empty data and an 'error' or
+    'timeout' status instead of failing the whole batch.
+    """
+    start = time.perf_counter()
+    futures = {name: _executor.submit(_timed, fetch) for name, fetch in fetchers.items()}
+    done, _ = wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if future not in done:
+            logger.warning(f"{name} did not respond within {deadline}s")
+            results[name] = SourceResult(name, 'timeout', [], time.perf_counter() - start, 'deadline exceeded')
+            continue
+
+        data, elapsed, error = future.result()
+        if error is not None:
+            logger.error(f"Error fetching {name}: {str(error)}")
+            results[name] = SourceResult(name, 'error', [], elapsed, str(error))
+        else:
+            results[name] = SourceResult(name, 'ok', data if data is not None else [], elapsed, None)
+
+    return results
+
+
+async def _timed_async(fetch):
+    start = time.perf_counter()
+    try:
+        return await fetch(), time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, e
+
+
+async def fetch_all_async(fetchers, deadline=DEFAULT_DEADLINE):
+    """Async counterpart of ``fetch_all`` for zero-argument coroutine functions.
+
+    All fetches run on the current event loop; results have the same shape
+    and statuses as ``fetch_all``.
+    """
+    start = time.perf_counter()
+    tasks = {name: asyncio.ensure_future(_timed_async(fetch)) for name, fetch in fetchers.items()}
+    if not tasks:
+        return {}
+    done, _ = await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    for name, task in tasks.items():
+        if task not in done:
+            task.cancel()
+            logger.warning(f"{name} did not respond within {deadline}s")
+            results[name] = SourceResult(name, 'timeout', [], time.perf_counter() - start, 'deadline exceeded')
+            continue
+
+        data, elapsed, error = task.result()
+        if error is not None:
+            logger.error(f"Error fetching {name}: {str(error)}")
+            results[name] = SourceResult(name, 'error', [], elapsed, str(error))
+        else:
+            results[name] = SourceResult(name, 'ok', data if data is not None else [], elapsed, None)
+
+    return results
@@ -0,0 +1,141 @@
+"""Cross-bank comparisons and the gold premium, computed once per snapshot.
+
+``MarketAnalytics`` is built from the currency and gold quotes of one
+MarketView (see ``MarketView.analytics``), so the /api/best and
+/api/analytics handlers, and the CLI, only read precomputed dicts.
+"""
+import statistics
+
+# Grams in a Vietnamese tael (luong) and in a troy ounce
+GRAMS_PER_TAEL = 37.5
+GRAMS_PER_OUNCE = 31.1034768
+
+# DOJI publishes domestic gold in thousands of VND per tael; prices below
+# this are taken to be in thousands
+THOUSANDS_BELOW = 1_000_000
+
+# Bank whose USD selling rate converts the world gold price to VND
+REFERENCE_BANK = 'VCB'
+
+
+def _round(value):
+    return round(value, 6)
+
+
+def _stats(values):
+    return {
+        'mean': _round(statistics.fmean(values)),
+        'min': min(values),
+        'max': max(values),
+        'stdev': _round(statistics.pstdev(values)),
+    }
+
+
+def bank_quote(rate):
+    """One bank's rate with its mid and spread"""
+    mid = (rate.buy + rate.sell) / 2
+    spread = rate.sell - rate.buy
+    return {
+        'bank': rate.bank,
+        'buy': rate.buy,
+        'sell': rate.sell,
+        'mid': _round(mid),
+        'spread': _round(spread),
+        'spread_pct': _round(spread / mid * 100) if mid else None,
+    }
+
+
+def currency_analytics(currency, rates):
+    """Rankings and cross-bank statistics for one currency.
+
+    Banks are ranked by buy rate (highest first: the most VND for selling
+    the currency), by sell rate (lowest first: the cheapest to buy it) and
+    by spread (tightest first).
+    """
+    quotes = [bank_quote(rate) for rate in rates]
+    by_buy = sorted(quotes, key=lambda quote: -quote['buy'])
+    by_sell = sorted(quotes, key=lambda quote: quote['sell'])
+    by_spread = sorted(quotes, key=lambda quote: quote['spread'])
+
+    return {
+        'currency': currency,
+        'banks': len(quotes),
+        'quotes': quotes,
+        'rank_by_buy': [quote['bank'] for quote in by_buy],
+        'rank_by_sell': [quote['bank'] for quote in by_sell],
+        'rank_by_spread': [quote['bank'] for quote in by_spread],
+        'best': {
+            'buy': {'bank': by_buy[0]['bank'], 'rate': by_buy[0]['buy']},
+            'sell': {'bank': by_sell[0]['bank'], 'rate': by_sell[0]['sell']},
+            'spread': {'bank': by_spread[0]['bank'], 'spread': by_spread[0]['spread'],
+                       'spread_pct': by_spread[0]['spread_pct']},
+        },
+        'buy': _stats([quote['buy'] for quote in quotes]),
+        'sell': _stats([quote['sell'] for quote in quotes]),
+        'mid': _stats([quote['mid'] for quote in quotes]),
+        'spread': _stats([quote['spread'] for quote in quotes]),
+    }
+
+
+def vnd_per_tael(price):
+    """VND per tael for a domestic gold price, scaling up prices given in thousands"""
+    return price * 1000 if price < THOUSANDS_BELOW else price
+
+
+def gold_premium(gold_rates, usd_rates):
+    """Domestic gold prices against the world price converted to VND per tael.
+
+    The world price is the international USD/oz quote, converted at the
+    reference bank's USD selling rate (any bank's if it has none). Returns
+    None when either input is missing or zero; domestic rows with no price
+    are skipped.
+    """
+    world = next((rate for rate in gold_rates
+                  if rate.category == 'international' and rate.unit == 'USD/oz'), None)
+    usd = next((rate for rate in usd_rates if rate.bank == REFERENCE_BANK), None)
+    if usd is None and usd_rates:
+        usd = usd_rates[0]
+    if world is None or usd is None:
+        return None
+
+    usd_per_ounce = world.sell or world.buy
+    if usd_per_ounce <= 0 or not usd.sell:
+        return None
+    world_vnd = usd_per_ounce * usd.sell * GRAMS_PER_TAEL / GRAMS_PER_OUNCE
+
+    quotes = []
+    for rate in gold_rates:
+        if rate.category != 'domestic' or not (rate.sell or rate.buy):
+            continue
+        price = vnd_per_tael(rate.sell or rate.buy)
+        quotes.append({
+            'key': rate.key,
+            'name': rate.name,
+            'price': price,
+            'price_side': 'sell' if rate.sell else 'buy',
+            'premium': round(price - world_vnd),
+            'premium_pct': _round((price - world_vnd) / world_vnd * 100),
+        })
+
+    return {
+        'world_usd_per_ounce': usd_per_ounce,
+        'usd_rate': {'bank': usd.bank, 'sell': usd.sell},
+        'world_vnd_per_tael': round(world_vnd),
+        'unit': 'VND/tael',
+        'quotes': quotes,
+    }
+
+
+class MarketAnalytics:
+    """Best rates, rankings and spreads per currency plus the gold premium"""
+
+    def __init__(self, currency_rates, gold_rates):
+        by_currency = {}
+        for rate in currency_rates:
+            by_currency.setdefault(rate.currency, []).append(rate)
+
+        self.currencies = {
+            currency: currency_analytics(currency, rates) for currency, rates in by_currency.items()
+        }
+        self.best = {currency: entry['best'] for currency, entry in self.currencies.items()}
+        self.gold_premium = gold_premium(gold_rates, by_currency.get('USD', []))
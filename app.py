@@ -1,9 +1,25 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-from scraper.vcb import get_vcb_rates
-from scraper.agribank import get_agribank_rates
-from scraper.doji_gold import get_doji_gold_rates, get_gold_charts
+from scraper import registry
+from cache import TTLCache
+from scheduler import RefreshScheduler
+from shared_snapshot import LeaderLock, SharedSnapshot
+from aggregator import fetch_all
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from storage import QuoteStore
+from market import MarketView
+from quotes import as_dicts
+from responses import ResponseCache, dumps, loads, respond
+from convert import as_amounts, to_list
+from downsample import INTERVALS, history_ohlc
+from scraper.http_client import conditional_stats
+import metrics
+from datetime import datetime, timezone
+from functools import partial
 import logging
+import math
+import os
+import time
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -12,10 +28,182 @@ CORS(app)  # Enable CORS for all routes
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Every registered source by name (see scraper/registry.py), and the names
+# of the bank and gold sources in display order
+SOURCES = registry.sources()
+CURRENCY_NAMES = registry.names('currency')
+GOLD_NAMES = registry.names('gold')
+
+# Shared cache so repeated requests don't hit the banks every time
+cache = TTLCache({name: source.ttl for name, source in SOURCES.items()})
+
+# One circuit breaker per source, so a broken upstream is skipped with
+# backoff instead of being hit (and waited on) every poll and request
+breakers = {name: CircuitBreaker(name) for name in SOURCES}
+
+# With several worker processes (see gunicorn.conf.py) one worker polls the
+# sources and the rest read its snapshots from this file
+shared_path = os.environ.get('SHARED_SNAPSHOT')
+shared = SharedSnapshot(shared_path) if shared_path else None
+leader_lock = LeaderLock(shared_path + '.lock') if shared_path else None
+
+# Background polling keeps the snapshot warm so handlers never scrape inline
+scheduler = RefreshScheduler(registry.sync_fetchers(),
+                             intervals={name: source.interval for name, source in SOURCES.items()},
+                             cache=cache, shared=shared, leader_lock=leader_lock, breakers=breakers)
+
+# Every published quote also goes into the local history store
+history = QuoteStore() if os.environ.get('HISTORY_ENABLED', '1') == '1' else None
+
+def record_history(name, value, changes):
+    history.record(name, [change.new for change in changes if change.new is not None])
+
+if history is not None:
+    scheduler.subscribe(record_history)
+
+def load_sources(names, snapshot=None):
+    """Latest data and status per source.
+
+    Sources already in the snapshot are read from memory; any that are not
+    yet published are fetched concurrently through the cache, except in a
+    follower worker, which waits for the leader's first poll instead of
+    scraping too. Published data from a source that has been failing since
+    is the last good value and gets the status 'stale'.
+    """
+    if snapshot is None:
+        snapshot = scheduler.snapshot()
+    follower = scheduler.is_follower
+    if follower and any(snapshot.get(name) is None for name in names):
+        snapshot = scheduler.wait_for_publish(names)
+    data, status, missing = {}, {}, {}
+
+    for name in names:
+        rows = snapshot.get(name)
+        if rows is None and follower:
+            data[name] = []
+            status[name] = {'status': 'error', 'count': 0, 'error': 'not published by the polling worker yet',
+                            **snapshot.health.get(name, {})}
+            continue
+        if rows is None:
+            missing[name] = partial(cache.get, name, partial(breakers[name].call, SOURCES[name].fetch_sync))
+            continue
+        health = snapshot.health.get(name, {})
+        data[name] = rows
+        status[name] = {'status': 'stale' if health.get('failures') else 'ok', 'count': len(rows), **health}
+
+    if missing:
+        for name, result in fetch_all(missing).items():
+            data[name] = result.data
+            status[name] = result.as_dict()
+
+    return data, status
+
+_view = None
+
+# Seconds a view with a failed unpublished source is reused before retrying
+RETRY_UNPUBLISHED = 15
+
+# Views with unpublished sources merged in, by (snapshot version, sources),
+# reused while the fetched data is fresh so their bodies and ETags are stable
+_merged = {}
+
+def cached_merge(view, missing):
+    """The reusable merged view of ``view`` plus ``missing``, or None"""
+    entry = _merged.get((view.version, missing))
+    if entry is not None and entry[1] > time.monotonic():
+        return entry[0]
+    return None
+
+def remember_merge(view, missing, merged):
+    """Keep ``merged`` for the shortest TTL of the sources fetched for it"""
+    ok = all(merged.status.get(name, {}).get('status') == 'ok' for name in missing)
+    lifetime = min(SOURCES[name].ttl for name in missing) if ok else RETRY_UNPUBLISHED
+    for key in list(_merged):
+        if key[0] != view.version:
+            _merged.pop(key, None)
+    _merged[(view.version, missing)] = (merged, time.monotonic() + lifetime)
+    return merged
+
+def market_view(names=tuple(SOURCES)):
+    """Indexed view of the current snapshot, built once per snapshot version.
+
+    Sources in ``names`` that have not been published yet are fetched
+    through the cache and merged into a view that is reused while that
+    data is fresh.
+    """
+    global _view
+    snapshot = scheduler.snapshot()
+    view = _view
+    if view is None or view.version != snapshot.version:
+        published = [name for name in SOURCES if name in snapshot.data]
+        data, status = load_sources(published, snapshot)
+        view = _view = MarketView(snapshot.version, data, status, snapshot.fetched_at, snapshot.created_at)
+
+    missing = tuple(name for name in names if not view.has(name))
+    if missing:
+        merged = cached_merge(view, missing)
+        view = merged or remember_merge(view, missing, view.merged(*load_sources(missing)))
+    return view
+
+# Rebuild the indexes as soon as a refresh lands rather than on the next request
+scheduler.subscribe(lambda name, value, changes: market_view(()))
+
+if os.environ.get('SCHEDULER_ENABLED', '1') == '1':
+    scheduler.start()
+
+# Bodies of the hot endpoints, serialized once per snapshot view
+response_cache = ResponseCache()
+
+def cached_json(key, view, build):
+    """Serve build()'s payload, rendering it only once for this view"""
+    return respond(response_cache.render(key, view, build))
+
+def view_timestamp(view):
+    return datetime.fromtimestamp(view.created_at).isoformat()
+
+def source_status(view):
+    """Per-source status with the time its published data was fetched"""
+    status = {}
+    for name, entry in view.status.items():
+        entry = dict(entry)
+        if name in view.fetched_at:
+            entry['fetched_at'] = datetime.fromtimestamp(view.fetched_at[name]).isoformat()
+        if entry.get('retry_at'):
+            entry['retry_at'] = datetime.fromtimestamp(entry['retry_at']).isoformat()
+        status[name] = entry
+    return status
+
+@metrics.REGISTRY.collector
+def collect_metrics():
+    """Copy cache, snapshot and breaker state into the metrics registry"""
+    for event, count in cache.stats.items():
+        metrics.CACHE_EVENTS.set(count, event=event)
+    for name, counts in cache.flight.stats.items():
+        for role, count in counts.items():
+            metrics.SINGLEFLIGHT_CALLS.set(count, source=name, role=role)
+    for result, count in conditional_stats.items():
+        metrics.CONDITIONAL_FETCHES.set(count, result=result)
+
+    snapshot = scheduler.snapshot()
+    now = time.time()
+    metrics.SNAPSHOT_VERSION.set(snapshot.version)
+    if snapshot.version:
+        metrics.SNAPSHOT_AGE.set(now - snapshot.created_at)
+    for name, fetched_at in snapshot.fetched_at.items():
+        metrics.SOURCE_AGE.set(now - fetched_at, source=name)
+    for name, polled_at in scheduler.polled_at().items():
+        metrics.SOURCE_POLL_AGE.set(now - polled_at, source=name)
+
+    for name in SOURCES:
+        health = snapshot.health.get(name, {})
+        for state in (CLOSED, HALF_OPEN, OPEN):
+            metrics.CIRCUIT_STATE.set(int(health.get('circuit', CLOSED) == state), source=name, state=state)
+        metrics.CIRCUIT_FAILURES.set(health.get('failures', 0), source=name)
+
 def aggregate_rates():
     """Aggregate currency rates from all banks"""
     try:
-        all_rates = get_vcb_rates() + get_agribank_rates()
+        all_rates = market_view(CURRENCY_NAMES).currency_rates
         logger.info(f"Successfully fetched {len(all_rates)} currency rates")
         return all_rates
     except Exception as e:
@@ -23,226 +211,553 @@ def aggregate_rates():
         return []
 
 def aggregate_gold_rates():
-    """Aggregate gold rates from DOJI"""
+    """Aggregate gold rates from every gold source"""
     try:
-        gold_rates = get_doji_gold_rates()
+        gold_rates = market_view(GOLD_NAMES).gold_rates
         logger.info(f"Successfully fetched {len(gold_rates)} gold rates")
         return gold_rates
     except Exception as e:
         logger.error(f"Error aggregating gold rates: {str(e)}")
         return []
 
-@app.route('/')
-def home():
-    """Health check endpoint"""
-    return jsonify({
+ENDPOINTS = {
+    "/": "Health check",
+    "/metrics": "Prometheus metrics (fetch, parse, cache, snapshot and request timings)",
+    "/api/rates": "Get all currency exchange rates",
+    "/api/rates/<currency>": "Get rates for specific currency (USD, EUR, JPY, CNY)",
+    "/api/gold": "Get all gold prices",
+    "/api/gold/<category>": "Get gold prices by category (domestic, international, jewelry)",
+    "/api/gold/charts": "Get gold price chart URLs",
+    "/api/rates/<currency>/history": "OHLC history for a currency (?bank=&interval=minute|hour|day&start=&end=)",
+    "/api/gold/<category>/history": "OHLC history for a gold category (?key=&interval=&start=&end=)",
+    "/api/all": "Get both currency and gold data",
+    "/api/best": "Best buy, sell and spread per currency across banks",
+    "/api/analytics": "Bank rankings, cross-bank mid/spread statistics and the gold premium over the world price",
+    "/api/convert": "Convert amounts between VND, currencies and gold (?amount=&from=&to=&bank=, or POST a batch)",
+    "/api/stream": "Server-Sent Events of rate changes (?currency=USD,EUR&gold=domestic), ASGI server only"
+}
+
+GOLD_CATEGORIES = ['domestic', 'international', 'jewelry', 'gold_jewelry']
+
+# Scheduler source name -> bank name shown in the API
+CURRENCY_SOURCES = {name: SOURCES[name].label for name in CURRENCY_NAMES}
+
+# The payload functions below are shared by this Flask app and the ASGI app
+# in asgi.py. Each returns (status, cache key, payload): on success the key
+# names the rendering in response_cache and the payload is a zero-argument
+# builder; errors and uncached bodies come back with key None and a dict.
+
+def home_payload():
+    return 200, None, {
         "status": "ok",
         "message": "FX Rate & Gold Price API is running",
-        "endpoints": {
-            "/": "Health check",
-            "/api/rates": "Get all currency exchange rates",
-            "/api/rates/<currency>": "Get rates for specific currency (USD, EUR, JPY, CNY)",
-            "/api/gold": "Get all gold prices",
-            "/api/gold/<category>": "Get gold prices by category (domestic, international, jewelry)",
-            "/api/gold/charts": "Get gold price chart URLs",
-            "/api/all": "Get both currency and gold data"
+        "endpoints": ENDPOINTS
+    }
+
+def internal_error_payload(e):
+    return 500, None, {
+        "error": "Internal server error",
+        "message": str(e)
+    }
+
+def stale_sources(view, names):
+    """Sources in ``names`` whose data is a last good value, not the latest scrape"""
+    return [name for name in names if view.status.get(name, {}).get('status') == 'stale']
+
+def rates_payload(view):
+    rates = view.currency_rates
+    if not rates:
+        return 503, None, {
+            "error": "No currency rates available",
+            "data": []
+        }
+
+    return 200, 'rates', lambda: {
+        "status": "success",
+        "type": "currency",
+        "data": as_dicts(rates),
+        "count": len(rates),
+        "stale": stale_sources(view, CURRENCY_SOURCES),
+        "timestamp": view_timestamp(view)
+    }
+
+def currency_payload(view, currency):
+    currency_rates = view.by_currency.get(currency, [])
+    if not currency_rates:
+        return 404, None, {
+            "error": f"No rates found for currency {currency}",
+            "data": []
+        }
+
+    return 200, f'rates/{currency}', lambda: {
+        "status": "success",
+        "type": "currency",
+        "currency": currency,
+        "data": as_dicts(currency_rates),
+        "count": len(currency_rates)
+    }
+
+def gold_payload(view):
+    rates = view.gold_rates
+    if not rates:
+        return 503, None, {
+            "error": "No gold rates available",
+            "data": []
+        }
+
+    return 200, 'gold', lambda: {
+        "status": "success",
+        "type": "gold",
+        "data": as_dicts(rates),
+        "categorized": {category: as_dicts(rows) for category, rows in view.by_category.items()},
+        "count": len(rates),
+        "stale": stale_sources(view, GOLD_NAMES),
+        "timestamp": view_timestamp(view)
+    }
+
+def invalid_category_payload(category, empty):
+    """Error for an unknown gold category, or None when it is valid"""
+    if category in GOLD_CATEGORIES:
+        return None
+    return 400, None, {
+        "error": f"Invalid category. Valid categories: {', '.join(GOLD_CATEGORIES)}",
+        "data": empty
+    }
+
+def gold_category_payload(view, category):
+    # Handle 'jewelry' as alias for 'gold_jewelry'
+    search_category = 'gold_jewelry' if category == 'jewelry' else category
+    filtered_rates = view.by_category.get(search_category, [])
+    if not filtered_rates:
+        return 404, None, {
+            "error": f"No gold rates found for category {category}",
+            "data": []
+        }
+
+    return 200, f'gold/{category}', lambda: {
+        "status": "success",
+        "type": "gold",
+        "category": category,
+        "data": as_dicts(filtered_rates),
+        "count": len(filtered_rates)
+    }
+
+def charts_payload(view):
+    charts = view.charts
+    if not charts:
+        return 503, None, {
+            "error": "No gold charts available",
+            "data": []
+        }
+
+    return 200, 'gold/charts', lambda: {
+        "status": "success",
+        "type": "gold_charts",
+        "data": charts,
+        "count": len(charts),
+        "timestamp": view_timestamp(view)
+    }
+
+def all_payload(view):
+    currency_rates = view.currency_rates
+    gold_rates = view.gold_rates
+
+    return 200, 'all', lambda: {
+        "status": "success",
+        "data": {
+            "currency": {
+                "rates": as_dicts(currency_rates),
+                "count": len(currency_rates)
+            },
+            "gold": {
+                "rates": as_dicts(gold_rates),
+                "count": len(gold_rates),
+                "categories": {
+                    "domestic": as_dicts(view.by_category.get('domestic', [])),
+                    "international": as_dicts(view.by_category.get('international', [])),
+                    "jewelry": as_dicts(view.by_category.get('gold_jewelry', []))
+                }
+            }
+        },
+        "sources": source_status(view),
+        "stale": stale_sources(view, SOURCES),
+        "total_count": len(currency_rates) + len(gold_rates),
+        "timestamp": view_timestamp(view)
+    }
+
+def best_payload(view):
+    best = view.analytics.best
+    if not best:
+        return 503, None, {
+            "error": "No currency rates available",
+            "data": {}
+        }
+
+    return 200, 'best', lambda: {
+        "status": "success",
+        "type": "best_rates",
+        "data": best,
+        "count": len(best),
+        "stale": stale_sources(view, CURRENCY_SOURCES),
+        "timestamp": view_timestamp(view)
+    }
+
+def analytics_payload(view):
+    analytics = view.analytics
+    if not analytics.currencies and analytics.gold_premium is None:
+        return 503, None, {
+            "error": "No market data available",
+            "data": {}
         }
-    })
+
+    return 200, 'analytics', lambda: {
+        "status": "success",
+        "type": "analytics",
+        "data": {
+            "currencies": analytics.currencies,
+            "gold_premium": analytics.gold_premium
+        },
+        "stale": stale_sources(view, SOURCES),
+        "timestamp": view_timestamp(view)
+    }
+
+# Conversions accepted in one /api/convert request
+CONVERT_MAX_BATCH = int(os.environ.get('CONVERT_MAX_BATCH', 200000))
+
+def conversion_batch(body):
+    """(amounts, from codes, to codes, bank) from a POST body holding either
+    parallel "amount"/"from"/"to" arrays or a "conversions" list of objects"""
+    try:
+        batch = loads(body)
+    except ValueError:
+        raise ValueError("Request body must be JSON")
+    if not isinstance(batch, dict):
+        raise ValueError("Request body must be a JSON object")
+
+    conversions = batch.get('conversions')
+    if conversions is not None:
+        if not isinstance(conversions, list) or not all(isinstance(item, dict) for item in conversions):
+            raise ValueError("conversions must be a list of {amount, from, to} objects")
+        amounts = [item.get('amount', 1) for item in conversions]
+        sources = [item.get('from') for item in conversions]
+        targets = [item.get('to') for item in conversions]
+    else:
+        amounts, sources, targets = batch.get('amount'), batch.get('from'), batch.get('to')
+        if not all(isinstance(values, list) for values in (amounts, sources, targets)):
+            raise ValueError("Send parallel amount, from and to arrays or a conversions list")
+    return amounts, sources, targets, batch.get('bank')
+
+def convert_payload(view, args, body=None):
+    """One conversion from the query string, or a batch from a POST body.
+
+    Rates come from the snapshot's RateTable: the best rates across banks
+    unless a bank is named. Results are null where a leg has no quote.
+    """
+    table = view.rate_table
+    if not view.currency_rates:
+        return 503, None, {"error": "No currency rates available", "data": {}}
+
+    try:
+        if body is None:
+            if not args.get('from') or not args.get('to'):
+                raise ValueError("from and to are required")
+            amounts, sources, targets = [args.get('amount', '1')], [args['from']], [args['to']]
+            bank = args.get('bank')
+        else:
+            amounts, sources, targets, bank = conversion_batch(body)
+            bank = bank or args.get('bank')
+        if len(amounts) > CONVERT_MAX_BATCH:
+            raise ValueError(f"At most {CONVERT_MAX_BATCH} conversions per request")
+        amounts = as_amounts(amounts)
+
+        # Accept source names ('vcb') as well as bank names ('VCB')
+        if bank:
+            bank = CURRENCY_SOURCES.get(str(bank).lower(), bank)
+        bank = table.banks[table.bank_index(bank)]
+        results, rates = table.convert(amounts, sources, targets, bank)
+    except ValueError as e:
+        return 400, None, {"error": str(e), "data": {}}
+
+    result_list = to_list(results)
+    if body is None:
+        data = {
+            "amount": amounts[0].item(),
+            "from": sources[0].strip().upper(),
+            "to": targets[0].strip().upper(),
+            "result": result_list[0],
+            "rate": to_list(rates)[0]
+        }
+    else:
+        data = {"result": result_list, "rate": to_list(rates)}
+
+    return 200, None, {
+        "status": "success",
+        "type": "conversion",
+        "bank": bank,
+        "data": data,
+        "count": len(results),
+        "unavailable": result_list.count(None),
+        "timestamp": view_timestamp(view)
+    }
+
+def parse_time(value, default):
+    """Accept unix seconds or an ISO 8601 timestamp, in UTC unless it has an offset"""
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        seconds = parsed.timestamp()
+    if not math.isfinite(seconds):
+        raise ValueError(f"Invalid time {value}")
+    return seconds
+
+def history_range(args):
+    """Validated (start, end, interval) from the query string"""
+    interval = args.get('interval', 'hour')
+    if interval not in INTERVALS:
+        raise ValueError(f"Invalid interval. Valid intervals: {', '.join(INTERVALS)}")
+
+    end = parse_time(args.get('end'), time.time())
+    start = parse_time(args.get('start'), end - 7 * 86400)
+    if start >= end:
+        raise ValueError("start must be before end")
+    return start, end, interval
+
+def currency_history_payload(currency, args):
+    """OHLC history for a currency, one series per bank (reads SQLite)"""
+    if history is None:
+        return 503, None, {"error": "History is disabled", "data": {}}
+
+    try:
+        start, end, interval = history_range(args)
+    except ValueError as e:
+        return 400, None, {"error": str(e), "data": {}}
+
+    bank = args.get('bank')
+    series = {}
+    for source, bank_name in CURRENCY_SOURCES.items():
+        if bank and bank.lower() not in (source, bank_name.lower()):
+            continue
+        buckets = history_ohlc(history, source, currency, start, end, interval)
+        if buckets:
+            series[bank_name] = buckets
+
+    if not series:
+        return 404, None, {
+            "error": f"No history found for currency {currency}",
+            "data": {}
+        }
+
+    return 200, None, {
+        "status": "success",
+        "type": "currency_history",
+        "currency": currency,
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "data": series
+    }
+
+def gold_history_payload(category, args):
+    """OHLC history for every key in a gold category, one group of series
+    per gold source (reads SQLite)"""
+    if history is None:
+        return 503, None, {"error": "History is disabled", "data": {}}
+
+    invalid = invalid_category_payload(category, {})
+    if invalid:
+        return invalid
+
+    try:
+        start, end, interval = history_range(args)
+    except ValueError as e:
+        return 400, None, {"error": str(e), "data": {}}
+
+    search_category = 'gold_jewelry' if category == 'jewelry' else category
+    key = args.get('key')
+    series = {}
+    for source in GOLD_NAMES:
+        keys = [key] if key else history.instruments(source, search_category)
+        for instrument in keys:
+            buckets = history_ohlc(history, source, instrument, start, end, interval, search_category)
+            if buckets:
+                series.setdefault(SOURCES[source].label, {})[instrument] = buckets
+
+    if not series:
+        return 404, None, {
+            "error": f"No history found for category {category}",
+            "data": {}
+        }
+
+    return 200, None, {
+        "status": "success",
+        "type": "gold_history",
+        "category": category,
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "data": series
+    }
+
+def serve(result, view=None):
+    """Turn a payload function's result into a Flask response"""
+    status, key, payload = result
+    if key is None:
+        return Response(dumps(payload), status=status, content_type='application/json')
+    return cached_json(key, view, payload)
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/')
+def home():
+    """Health check endpoint"""
+    return serve(home_payload())
 
 @app.route('/api/rates')
 def get_rates():
     """Get all currency exchange rates"""
     try:
-        rates = aggregate_rates()
-        
-        if not rates:
-            return jsonify({
-                "error": "No currency rates available",
-                "data": []
-            }), 503
-            
-        return jsonify({
-            "status": "success",
-            "type": "currency",
-            "data": rates,
-            "count": len(rates),
-            "timestamp": __import__('datetime').datetime.now().isoformat()
-        })
+        view = market_view(CURRENCY_NAMES)
+        return serve(rates_payload(view), view)
     except Exception as e:
         logger.error(f"Error in get_rates: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "message": str(e)
-        }), 500
+        return serve(internal_error_payload(e))
 
 @app.route('/api/rates/<currency>')
 def get_currency_rates(currency):
     """Get rates for a specific currency"""
     try:
-        currency = currency.upper()
-        all_rates = aggregate_rates()
-        
-        currency_rates = [rate for rate in all_rates if rate['currency'] == currency]
-        
-        if not currency_rates:
-            return jsonify({
-                "error": f"No rates found for currency {currency}",
-                "data": []
-            }), 404
-            
-        return jsonify({
-            "status": "success",
-            "type": "currency",
-            "currency": currency,
-            "data": currency_rates,
-            "count": len(currency_rates)
-        })
+        view = market_view(CURRENCY_NAMES)
+        return serve(currency_payload(view, currency.upper()), view)
     except Exception as e:
         logger.error(f"Error in get_currency_rates: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "message": str(e)
-        }), 500
+        return serve(internal_error_payload(e))
+
+@app.route('/api/rates/<currency>/history')
+def get_currency_history(currency):
+    """Get OHLC history for a currency, one series per bank"""
+    try:
+        return serve(currency_history_payload(currency.upper(), request.args))
+    except Exception as e:
+        logger.error(f"Error in get_currency_history: {str(e)}")
+        return serve(internal_error_payload(e))
 
 @app.route('/api/gold')
 def get_gold_rates():
     """Get all gold prices"""
     try:
-        rates = aggregate_gold_rates()
-        
-        if not rates:
-            return jsonify({
-                "error": "No gold rates available",
-                "data": []
-            }), 503
-            
-        # Group by category for better organization
-        categorized_data = {}
-        for rate in rates:
-            category = rate['category']
-            if category not in categorized_data:
-                categorized_data[category] = []
-            categorized_data[category].append(rate)
-            
-        return jsonify({
-            "status": "success",
-            "type": "gold",
-            "data": rates,
-            "categorized": categorized_data,
-            "count": len(rates),
-            "timestamp": __import__('datetime').datetime.now().isoformat()
-        })
+        view = market_view(GOLD_NAMES)
+        return serve(gold_payload(view), view)
     except Exception as e:
         logger.error(f"Error in get_gold_rates: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "message": str(e)
-        }), 500
+        return serve(internal_error_payload(e))
 
 @app.route('/api/gold/<category>')
 def get_gold_by_category(category):
     """Get gold prices by category (domestic, international, jewelry)"""
     try:
-        valid_categories = ['domestic', 'international', 'jewelry', 'gold_jewelry']
-        if category not in valid_categories:
-            return jsonify({
-                "error": f"Invalid category. Valid categories: {', '.join(valid_categories)}",
-                "data": []
-            }), 400
-            
-        all_rates = aggregate_gold_rates()
-        
-        # Handle 'jewelry' as alias for 'gold_jewelry'
-        search_category = 'gold_jewelry' if category == 'jewelry' else category
-        
-        filtered_rates = [rate for rate in all_rates if rate['category'] == search_category]
-        
-        if not filtered_rates:
-            return jsonify({
-                "error": f"No gold rates found for category {category}",
-                "data": []
-            }), 404
-            
-        return jsonify({
-            "status": "success",
-            "type": "gold",
-            "category": category,
-            "data": filtered_rates,
-            "count": len(filtered_rates)
-        })
+        invalid = invalid_category_payload(category, [])
+        if invalid:
+            return serve(invalid)
+
+        view = market_view(GOLD_NAMES)
+        return serve(gold_category_payload(view, category), view)
     except Exception as e:
         logger.error(f"Error in get_gold_by_category: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "message": str(e)
-        }), 500
+        return serve(internal_error_payload(e))
+
+@app.route('/api/gold/<category>/history')
+def get_gold_history(category):
+    """Get OHLC history for every key in a gold category"""
+    try:
+        return serve(gold_history_payload(category, request.args))
+    except Exception as e:
+        logger.error(f"Error in get_gold_history: {str(e)}")
+        return serve(internal_error_payload(e))
 
 @app.route('/api/gold/charts')
 def get_gold_charts_endpoint():
     """Get gold price chart URLs"""
     try:
-        charts = get_gold_charts()
-        
-        if not charts:
-            return jsonify({
-                "error": "No gold charts available",
-                "data": []
-            }), 503
-            
-        return jsonify({
-            "status": "success",
-            "type": "gold_charts",
-            "data": charts,
-            "count": len(charts),
-            "timestamp": __import__('datetime').datetime.now().isoformat()
-        })
+        view = market_view(GOLD_NAMES)
+        return serve(charts_payload(view), view)
     except Exception as e:
         logger.error(f"Error in get_gold_charts: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "message": str(e)
-        }), 500
+        return serve(internal_error_payload(e))
 
 @app.route('/api/all')
 def get_all_data():
     """Get both currency and gold data"""
     try:
-        currency_rates = aggregate_rates()
-        gold_rates = aggregate_gold_rates()
-        
-        return jsonify({
-            "status": "success",
-            "data": {
-                "currency": {
-                    "rates": currency_rates,
-                    "count": len(currency_rates)
-                },
-                "gold": {
-                    "rates": gold_rates,
-                    "count": len(gold_rates),
-                    "categories": {
-                        "domestic": [r for r in gold_rates if r['category'] == 'domestic'],
-                        "international": [r for r in gold_rates if r['category'] == 'international'],
-                        "jewelry": [r for r in gold_rates if r['category'] == 'gold_jewelry']
-                    }
-                }
-            },
-            "total_count": len(currency_rates) + len(gold_rates),
-            "timestamp": __import__('datetime').datetime.now().isoformat()
-        })
+        view = market_view()
+        return serve(all_payload(view), view)
     except Exception as e:
         logger.error(f"Error in get_all_data: {str(e)}")
-        return jsonify({
-            "error": "Internal server error",
-            "message": str(e)
-        }), 500
+        return serve(internal_error_payload(e))
 
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
+@app.route('/api/best')
+def get_best_rates():
+    """Get the best buy, sell and spread per currency"""
+    try:
+        view = market_view(CURRENCY_NAMES)
+        return serve(best_payload(view), view)
+    except Exception as e:
+        logger.error(f"Error in get_best_rates: {str(e)}")
+        return serve(internal_error_payload(e))
+
+@app.route('/api/analytics')
+def get_analytics():
+    """Get bank rankings, spread statistics and the gold premium"""
+    try:
+        view = market_view()
+        return serve(analytics_payload(view), view)
+    except Exception as e:
+        logger.error(f"Error in get_analytics: {str(e)}")
+        return serve(internal_error_payload(e))
+
+@app.route('/api/convert', methods=['GET', 'POST'])
+def convert_amounts():
+    """Convert amounts between VND, currencies and gold"""
+    try:
+        view = market_view()
+        body = request.get_data() if request.method == 'POST' else None
+        return serve(convert_payload(view, request.args, body))
+    except Exception as e:
+        logger.error(f"Error in convert_amounts: {str(e)}")
+        return serve(internal_error_payload(e))
+
+def not_found_payload():
+    return 404, None, {
         "error": "Endpoint not found",
         "message": "Please check the API documentation"
-    }), 404
+    }
+
+@app.errorhandler(404)
+def not_found(error):
+    return serve(not_found_payload())
 
 @app.errorhandler(500)
 def internal_error(error):
@@ -252,5 +767,5 @@ def internal_error(error):
     }), 500
 
 if __name__ == '__main__':
-    port = int(__import__('os').environ.get('PORT', 5000))
+    port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,273 @@
+"""ASGI version of the API, serving the same endpoints and JSON as app.py.
+
+Handlers never block the event loop: published data comes from the shared
+scheduler snapshot in memory, sources that are not published yet are
+fetched with the async scrapers, and SQLite history queries run in the
+thread pool. One process can therefore hold many open connections while
+upstream fetches are in flight.
+
+Run with ``uvicorn asgi:app`` or, with several workers,
+``gunicorn -k uvicorn.workers.UvicornWorker -c gunicorn.conf.py asgi:app``.
+"""
+import asyncio
+import logging
+import time
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import app as api
+import metrics
+from aggregator import fetch_all_async
+from responses import dumps, negotiate
+from stream import ChangeStream, parse_topics
+
+logger = logging.getLogger(__name__)
+
+# Cold fetches currently running, so concurrent requests share one per source
+_in_flight = {}
+
+
+async def fetch_source(name):
+    """Data for one unpublished source: a fresh cache entry or one shared fetch"""
+    age = api.cache.age(name)
+    if age is not None and age < api.cache.ttl_for(name):
+        return api.cache.peek(name)
+
+    task = _in_flight.get(name)
+    if task is None:
+        fetch = api.breakers[name].call_async(api.SOURCES[name].fetch)
+        task = _in_flight[name] = asyncio.ensure_future(fetch)
+        task.add_done_callback(lambda _: _in_flight.pop(name, None))
+
+    value = await asyncio.shield(task)
+    if value:
+        api.cache.put(name, value)
+    return value
+
+
+async def market_view(names=tuple(api.SOURCES)):
+    """Async counterpart of app.market_view"""
+    view = api.market_view(())
+    missing = tuple(name for name in names if not view.has(name))
+    if not missing:
+        return view
+    merged = api.cached_merge(view, missing)
+    if merged is not None:
+        return merged
+    if api.scheduler.is_follower:
+        # Wait for the polling worker's first publish rather than scrape too
+        data, status = await run_in_threadpool(api.load_sources, missing)
+        return api.remember_merge(view, missing, view.merged(data, status))
+
+    fetchers = {name: (lambda name=name: fetch_source(name)) for name in missing}
+    results = await fetch_all_async(fetchers)
+    data = {name: result.data for name, result in results.items()}
+    status = {name: result.as_dict() for name, result in results.items()}
+    return api.remember_merge(view, missing, view.merged(data, status))
+
+
+def serve(request, result, view=None):
+    """Turn a payload function's result into a Starlette response"""
+    status, key, payload = result
+    if key is None:
+        return Response(dumps(payload), status_code=status, media_type='application/json')
+
+    rendered = api.response_cache.render(key, view, payload)
+    status, body, headers = negotiate(
+        rendered,
+        request.headers.get('if-none-match'),
+        request.headers.get('accept-encoding'),
+    )
+    if status == 304:
+        return Response(status_code=304, headers=headers)
+    return Response(body, status_code=status, headers=headers, media_type='application/json')
+
+
+def endpoint(handler):
+    """Log handler errors and answer them with the API's 500 body"""
+    async def wrapped(request):
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Error in {handler.__name__}: {str(e)}")
+            return serve(request, api.internal_error_payload(e))
+    wrapped.__name__ = handler.__name__
+    return wrapped
+
+
+# Rate changes pushed to /api/stream clients
+changes = ChangeStream(lambda: api.market_view(()))
+
+STREAM_CLIENTS = metrics.Gauge('fx_stream_clients', 'Open /api/stream connections')
+metrics.REGISTRY.collector(lambda: STREAM_CLIENTS.set(changes.subscriber_count))
+
+
+class RequestTimer:
+    """ASGI middleware recording request latency per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            metrics.REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                endpoint=route.path if route is not None else 'unmatched',
+                method=scope['method'],
+                status=status,
+            )
+
+
+@endpoint
+async def home(request):
+    return serve(request, api.home_payload())
+
+
+@endpoint
+async def get_rates(request):
+    view = await market_view(api.CURRENCY_NAMES)
+    return serve(request, api.rates_payload(view), view)
+
+
+@endpoint
+async def get_currency_rates(request):
+    view = await market_view(api.CURRENCY_NAMES)
+    currency = request.path_params['currency'].upper()
+    return serve(request, api.currency_payload(view, currency), view)
+
+
+@endpoint
+async def get_currency_history(request):
+    currency = request.path_params['currency'].upper()
+    result = await run_in_threadpool(api.currency_history_payload, currency, request.query_params)
+    return serve(request, result)
+
+
+@endpoint
+async def get_gold_rates(request):
+    view = await market_view(api.GOLD_NAMES)
+    return serve(request, api.gold_payload(view), view)
+
+
+@endpoint
+async def get_gold_by_category(request):
+    category = request.path_params['category']
+    invalid = api.invalid_category_payload(category, [])
+    if invalid:
+        return serve(request, invalid)
+
+    view = await market_view(api.GOLD_NAMES)
+    return serve(request, api.gold_category_payload(view, category), view)
+
+
+@endpoint
+async def get_gold_history(request):
+    category = request.path_params['category']
+    result = await run_in_threadpool(api.gold_history_payload, category, request.query_params)
+    return serve(request, result)
+
+
+@endpoint
+async def get_gold_charts(request):
+    view = await market_view(api.GOLD_NAMES)
+    return serve(request, api.charts_payload(view), view)
+
+
+@endpoint
+async def get_all_data(request):
+    view = await market_view()
+    return serve(request, api.all_payload(view), view)
+
+
+@endpoint
+async def get_best_rates(request):
+    view = await market_view(api.CURRENCY_NAMES)
+    return serve(request, api.best_payload(view), view)
+
+
+@endpoint
+async def get_analytics(request):
+    view = await market_view()
+    return serve(request, api.analytics_payload(view), view)
+
+
+@endpoint
+async def convert_amounts(request):
+    view = await market_view()
+    body = await request.body() if request.method == 'POST' else None
+    result = await run_in_threadpool(api.convert_payload, view, request.query_params, body)
+    return serve(request, result)
+
+
+@endpoint
+async def stream_changes(request):
+    """Server-Sent Events: a snapshot of the matching rates, then only changes.
+
+    Filter with ``?currency=USD,EUR`` and/or ``?gold=domestic,jewelry``;
+    without filters every change is sent.
+    """
+    gold = request.query_params.get('gold')
+    for category in (gold or '').split(','):
+        category = category.strip()
+        if category and category != 'all':
+            invalid = api.invalid_category_payload(category, [])
+            if invalid:
+                return serve(request, invalid)
+
+    topics = parse_topics(request.query_params.get('currency'), gold)
+    subscription, view = changes.subscribe(topics)
+    return StreamingResponse(
+        changes.events(subscription, view),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+async def get_metrics(request):
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+async def not_found(request, exc):
+    return serve(request, api.not_found_payload())
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/metrics', get_metrics),
+        Route('/api/rates', get_rates),
+        Route('/api/rates/{currency}', get_currency_rates),
+        Route('/api/rates/{currency}/history', get_currency_history),
+        Route('/api/gold', get_gold_rates),
+        Route('/api/gold/charts', get_gold_charts),
+        Route('/api/gold/{category}', get_gold_by_category),
+        Route('/api/gold/{category}/history', get_gold_history),
+        Route('/api/all', get_all_data),
+        Route('/api/best', get_best_rates),
+        Route('/api/analytics', get_analytics),
+        Route('/api/convert', convert_amounts, methods=['GET', 'POST']),
+        Route('/api/stream', stream_changes),
+    ],
+    middleware=[Middleware(RequestTimer), Middleware(CORSMiddleware, allow_origins=['*'])],
+    exception_handlers={404: not_found},
+)
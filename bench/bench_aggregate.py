@@ -0,0 +1,85 @@
+"""End-to-end latency of aggregate_rates / aggregate_gold_rates.
+
+Each cold iteration empties the cache and the conditional-request
+validators, so it pays for the full fan-out to the stand-in upstream:
+HTTP, parse and indexing. Warm iterations are answered from the cache.
+Run from the repository root:
+
+    python -m bench.bench_aggregate [--latency 0.2 --jitter 0.05 --failure-rate 0.1] [--save]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+os.environ['SCHEDULER_ENABLED'] = '0'
+os.environ['HISTORY_ENABLED'] = '0'
+os.environ.setdefault('HISTORY_DB', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+import logging
+
+import app as api
+from breaker import CircuitBreaker
+from bench.results import add_result_arguments, report
+from bench.upstream import StandInUpstream, add_upstream_arguments, point_scrapers_at
+from scraper.http_client import reset_validators
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def reset():
+    """Forget everything fetched so the next call goes upstream again"""
+    api.cache.invalidate()
+    reset_validators()
+    # Injected failures should cost a real attempt every time, not open a circuit
+    for name in api.breakers:
+        api.breakers[name] = CircuitBreaker(name)
+
+
+def measure(fn, iterations, cold):
+    samples = []
+    for _ in range(iterations):
+        if cold:
+            reset()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run(iterations=30, **upstream_options):
+    results = {}
+    with StandInUpstream(**upstream_options) as upstream:
+        point_scrapers_at(upstream.url)
+        for name, fn in (('rates', api.aggregate_rates), ('gold', api.aggregate_gold_rates)):
+            for mode in ('cold', 'warm'):
+                reset()
+                if mode == 'warm':
+                    fn()
+                samples = measure(fn, iterations, cold=(mode == 'cold'))
+                results[f'aggregate_{name}_{mode}_p50_ms'] = statistics.median(samples)
+                results[f'aggregate_{name}_{mode}_p95_ms'] = percentile(samples, 0.95)
+        results['upstream_requests'] = upstream.stats['requests']
+        results['upstream_failures'] = upstream.stats['failures']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=30)
+    add_upstream_arguments(parser)
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    results = run(args.iterations, latency=args.latency, jitter=args.jitter,
+                  failure_rate=args.failure_rate, seed=args.seed)
+    report('aggregate', results, args.save, args.compare, args.output)
+
+
+if __name__ == '__main__':
+    main()
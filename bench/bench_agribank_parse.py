@@ -0,0 +1,35 @@
+"""Compare the Agribank parsers on saved fixture pages.
+
+Run from the repository root:
+
+    python -m bench.bench_agribank_parse
+"""
+import glob
+import os
+import timeit
+
+from scraper.agribank import parse_agribank_rates_bs4, parse_agribank_rates_lxml
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def bench(parse, html, number):
+    return min(timeit.repeat(lambda: parse(html), number=number, repeat=5)) / number
+
+
+def main(number=50):
+    for path in sorted(glob.glob(os.path.join(FIXTURES, 'agribank*.html'))):
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+
+        assert parse_agribank_rates_bs4(html) == parse_agribank_rates_lxml(html), path
+
+        bs4_time = bench(parse_agribank_rates_bs4, html, number)
+        lxml_time = bench(parse_agribank_rates_lxml, html, number)
+        print(f"{os.path.basename(path)} ({len(html.encode()) / 1024:.0f} KB)")
+        print(f"   bs4 (html.parser): {bs4_time * 1000:8.2f} ms")
+        print(f"   lxml streaming:    {lxml_time * 1000:8.2f} ms  ({bs4_time / lxml_time:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""API throughput and latency under concurrent load.
+
+Starts the stand-in upstream, launches the API in a separate process
+(Flask on a threaded werkzeug server, or the ASGI app on uvicorn) with its
+snapshot filled from the stand-in, then fires requests at it from many
+concurrent connections. Run from the repository root:
+
+    python -m bench.bench_api [--server flask|asgi|both] [--concurrency 50] [--requests 2000] [--save]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench.results import add_result_arguments, report
+from bench.upstream import StandInUpstream, add_upstream_arguments
+
+PATHS = ['/api/rates', '/api/rates/USD', '/api/gold', '/api/gold/domestic', '/api/all']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def serve(server, port, upstream_url):
+    """Child process: fill the snapshot from the stand-in and serve the API"""
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    os.environ['HISTORY_ENABLED'] = '0'
+    os.environ.setdefault('HISTORY_DB', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+    import logging
+    from bench.upstream import point_scrapers_at
+    point_scrapers_at(upstream_url)
+
+    import app as api
+    logging.disable(logging.WARNING)
+    for name in api.SOURCES:
+        api.scheduler.refresh(name)
+
+    if server == 'asgi':
+        import uvicorn
+        import asgi
+        uvicorn.run(asgi.app, host='127.0.0.1', port=port, log_level='warning', access_log=False)
+    else:
+        from werkzeug.serving import make_server
+        make_server('127.0.0.1', port, api.app, threaded=True).serve_forever()
+
+
+def wait_until_ready(base_url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API process exited with {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API at {base_url} did not come up within {timeout}s")
+
+
+async def load(base_url, total, concurrency):
+    """Latencies in ms of ``total`` requests over ``concurrency`` connections"""
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(PATHS[i % len(PATHS)])
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def run(servers=('flask', 'asgi'), total=2000, concurrency=50, **upstream_options):
+    results = {}
+    with StandInUpstream(**upstream_options) as upstream:
+        for server in servers:
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'bench.bench_api', '--serve', server,
+                 '--port', str(port), '--upstream', upstream.url],
+            )
+            try:
+                wait_until_ready(base_url, process)
+                asyncio.run(load(base_url, concurrency, concurrency))  # warm up connections
+                latencies, errors, elapsed = asyncio.run(load(base_url, total, concurrency))
+            finally:
+                process.terminate()
+                process.wait(10)
+
+            results[f'api_{server}_requests_per_s'] = total / elapsed
+            results[f'api_{server}_p50_ms'] = statistics.median(latencies)
+            results[f'api_{server}_p95_ms'] = sorted(latencies)[int(0.95 * (len(latencies) - 1))]
+            results[f'api_{server}_errors'] = errors
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=['flask', 'asgi', 'both'], default='both')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--serve', choices=['flask', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--upstream', help=argparse.SUPPRESS)
+    add_upstream_arguments(parser)
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve, args.port, args.upstream)
+
+    servers = ('flask', 'asgi') if args.server == 'both' else (args.server,)
+    results = run(servers, args.requests, args.concurrency, latency=args.latency,
+                  jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed)
+    report('api', results, args.save, args.compare, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Batch conversion throughput on a rate table built from the fixtures.
+
+Times building the RateTable for a snapshot and converting random batches
+of amount/from/to triples, at the best rates and at one bank. Run from the
+repository root:
+
+    python -m bench.bench_convert [--size 100000] [--save] [--compare RESULTS_JSON]
+"""
+import argparse
+import os
+import random
+import timeit
+
+from bench.results import add_result_arguments, report
+from convert import RateTable
+from scraper import registry
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+FIXTURE_FILES = {
+    'vcb': 'vcb.xml',
+    'agribank': 'agribank.html',
+    'doji': 'doji.xml',
+}
+
+
+def load_quotes():
+    """(currency rates, gold rates) parsed from the recorded fixtures"""
+    sources = registry.sources()
+    currency_rates, gold_rates = [], []
+    for name, filename in FIXTURE_FILES.items():
+        with open(os.path.join(FIXTURES, filename), 'rb') as f:
+            value = sources[name].parse(f.read())
+        if sources[name].kind == 'gold':
+            gold_rates.extend(value.rates)
+        else:
+            currency_rates.extend(value)
+    return currency_rates, gold_rates
+
+
+def run(size=100000, repeat=5, seed=1):
+    currency_rates, gold_rates = load_quotes()
+    table = RateTable(currency_rates, gold_rates)
+
+    generator = random.Random(seed)
+    amounts = [round(generator.uniform(1, 10000), 2) for _ in range(size)]
+    sources = [generator.choice(table.instruments) for _ in range(size)]
+    targets = [generator.choice(table.instruments) for _ in range(size)]
+
+    build = min(timeit.repeat(lambda: RateTable(currency_rates, gold_rates), number=100, repeat=repeat)) / 100
+    best = min(timeit.repeat(lambda: table.convert(amounts, sources, targets), number=1, repeat=repeat))
+    bank = min(timeit.repeat(lambda: table.convert(amounts, sources, targets, table.banks[1]),
+                             number=1, repeat=repeat))
+    return {
+        'convert_table_build_ms': build * 1000,
+        'convert_batch_best_ms': best * 1000,
+        'convert_batch_bank_ms': bank * 1000,
+        'convert_rows_per_s': size / best,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000, help="conversions per batch")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+    report('convert', run(args.size), args.save, args.compare, args.output)
+
+
+if __name__ == '__main__':
+    main()
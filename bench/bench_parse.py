@@ -0,0 +1,67 @@
+"""Parse throughput of each scraper on the recorded fixtures.
+
+Run from the repository root:
+
+    python -m bench.bench_parse [--save] [--compare RESULTS_JSON]
+"""
+import argparse
+import os
+import timeit
+import tracemalloc
+
+from bench.results import add_result_arguments, report
+from scraper import registry
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Source -> fixture file, parsed with the source's registered parse function
+FIXTURE_FILES = {
+    'vcb': 'vcb.xml',
+    'agribank': 'agribank.html',
+    'doji': 'doji.xml',
+}
+
+
+def retained_bytes(parse, content):
+    """Memory still held by one parse's result, after a warm-up parse.
+
+    Strings the quotes intern are already alive by then, so this is what
+    each further scrape of an unchanged feed adds to a snapshot.
+    """
+    tracemalloc.start()
+    try:
+        value = parse(content)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del value
+    return size
+
+
+def run(number=200):
+    results = {}
+    sources = registry.sources()
+    for name, filename in FIXTURE_FILES.items():
+        parse = sources[name].parse
+        with open(os.path.join(FIXTURES, filename), 'rb') as f:
+            content = f.read()
+
+        rows = len(parse(content))
+        seconds = min(timeit.repeat(lambda: parse(content), number=number, repeat=5)) / number
+        results[f'parse_{name}_ms'] = seconds * 1000
+        results[f'parse_{name}_mb_per_s'] = len(content) / seconds / 1e6
+        results[f'parse_{name}_rows_per_s'] = rows / seconds
+        results[f'parse_{name}_retained_bytes'] = retained_bytes(parse, content)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help="parses per timing run")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+    report('parse', run(args.number), args.save, args.compare, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Microbenchmark for translate_gold_name.
+
+Compares the single-pass translator (cold and memoized) against the old
+one-str.replace-per-term loop. Run from the repository root:
+
+    python -m bench.bench_translate
+"""
+import timeit
+
+from scraper.doji_gold import GOLD_TRANSLATIONS, translate_gold_name
+
+NAMES = [
+    'Vàng SJC', 'Vàng DOJI Hà Nội lẻ', 'Vàng nhẫn 9999 Hưng Thịnh Vượng', 'Vàng 24k',
+    'Vàng 18k', 'Vàng 14k', 'Vàng 10k', 'Vàng trang sức 9999', 'Vàng nữ trang 99.9',
+    'Vàng miếng SJC giá mua hôm nay', 'Bạch kim 950', 'Bạc thỏi 999', 'Kim cương 5 ly',
+    'USD/Ounce Spot Loco London', 'Vàng Bảo Tín Minh Châu cập nhật', 'Giá nghìn đồng/chỉ',
+]
+
+
+def translate_gold_name_replace_loop(vietnamese_name):
+    """The previous implementation, kept here as the baseline"""
+    result = vietnamese_name
+    for vn_term, en_term in GOLD_TRANSLATIONS.items():
+        result = result.replace(vn_term, en_term)
+    return ' '.join(result.split())
+
+
+def run(translate, number):
+    return min(timeit.repeat(lambda: [translate(name) for name in NAMES], number=number, repeat=5)) / (number * len(NAMES))
+
+
+def main(number=2000):
+    cold = translate_gold_name.__wrapped__
+    results = [
+        ('str.replace loop', run(translate_gold_name_replace_loop, number)),
+        ('single pass', run(cold, number)),
+        ('single pass + memo', run(translate_gold_name, number)),
+    ]
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(f"{label:20} {seconds * 1e6:8.2f} us/name  ({baseline / seconds:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Record the live VCB, Agribank and DOJI payloads as benchmark fixtures.
+
+Needs network access to the bank sites. Existing fixtures are overwritten
+only when the download parses into at least one row, so a broken page
+never replaces a good recording. Run from the repository root:
+
+    python -m bench.record_fixtures [--suffix -2024-06]
+"""
+import argparse
+import os
+
+from bench.upstream import FIXTURES, ROUTES
+from scraper import agribank, doji_gold, registry, vcb
+from scraper.http_client import fetch, run_sync
+
+# Fixture file -> (live URL, source whose parse function validates the download)
+SOURCES = {
+    'vcb.xml': (lambda: vcb.VCB_URL, 'vcb'),
+    'agribank.html': (lambda: agribank.AGRIBANK_URL, 'agribank'),
+    'doji.xml': (lambda: doji_gold.DOJI_URL, 'doji'),
+}
+
+
+def record(filename, suffix=''):
+    url, source = SOURCES[filename]
+    response = run_sync(fetch(url()))
+    rows = len(registry.sources()[source].parse(response.content))
+    if not rows:
+        raise ValueError(f"{url()} returned no rates, not saving it")
+
+    stem, ext = os.path.splitext(filename)
+    path = os.path.join(FIXTURES, f"{stem}{suffix}{ext}")
+    with open(path, 'wb') as f:
+        f.write(response.content)
+    return path, len(response.content), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suffix', default='', help="save as e.g. agribank<suffix>.html instead of replacing")
+    args = parser.parse_args()
+
+    for filename in (route[0] for route in ROUTES.values()):
+        try:
+            path, size, rows = record(filename, args.suffix)
+            print(f"{path}: {size / 1024:.1f} KB, {rows} rows")
+        except Exception as e:
+            print(f"{filename}: not recorded ({e})")
+
+
+if __name__ == '__main__':
+    main()
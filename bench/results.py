@@ -0,0 +1,80 @@
+"""Save benchmark results as JSON and compare them against a baseline.
+
+Results are flat ``{metric: number}`` dicts. Metric names ending in
+``_per_s`` are throughputs (higher is better); everything else is a time
+or size (lower is better).
+"""
+import json
+import os
+import platform
+import time
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# Changes smaller than this fraction are reported as noise
+THRESHOLD = 0.05
+
+
+def save(name, results, directory=RESULTS_DIR):
+    """Write ``results`` to ``<directory>/<name>-<timestamp>.json``; returns the path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'name': name,
+            'created_at': time.time(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+    return path
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Lines describing how each metric in ``current`` changed from ``baseline``"""
+    lines = []
+    for metric in sorted(current):
+        old, new = baseline.get(metric), current[metric]
+        if old is None:
+            lines.append(f"{metric:45} {'':12} -> {new:12.4f}  new")
+            continue
+
+        change = (new - old) / old if old else 0.0
+        if abs(change) < threshold:
+            verdict = 'same'
+        elif (change > 0) == higher_is_better(metric):
+            verdict = 'better'
+        else:
+            verdict = 'WORSE'
+        lines.append(f"{metric:45} {old:12.4f} -> {new:12.4f}  {change:+7.1%}  {verdict}")
+    return lines
+
+
+def report(name, results, save_results=False, baseline=None, output=None):
+    """Print results, optionally save them and compare with a baseline file"""
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'name': name, 'results': results}, f)
+    for metric, value in sorted(results.items()):
+        print(f"{metric:45} {value:12.4f}")
+    if save_results:
+        print(f"\nSaved to {save(name, results)}")
+    if baseline:
+        print(f"\nCompared with {baseline}:")
+        for line in compare(load(baseline), results):
+            print(line)
+
+
+def add_result_arguments(parser):
+    parser.add_argument('--save', action='store_true', help=f"save results under {RESULTS_DIR}")
+    parser.add_argument('--compare', metavar='RESULTS_JSON', help="compare with a saved result file")
+    parser.add_argument('--output', metavar='PATH', help="also write the raw results to PATH")
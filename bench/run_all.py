@@ -0,0 +1,50 @@
+"""Run the parse, convert, aggregate and API benchmarks and report them together.
+
+Every benchmark runs against the recorded fixtures and the stand-in
+upstream, never the bank sites. Run from the repository root:
+
+    python -m bench.run_all --save
+    python -m bench.run_all --compare bench/results/all-20240601-120000.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench.results import add_result_arguments, load, report
+
+
+def run_benchmark(module, args):
+    """Run one benchmark in a fresh interpreter and return its results.
+
+    The aggregate and API benchmarks import app.py with their own settings,
+    so they cannot share a process.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'results.json')
+        subprocess.run([sys.executable, '-m', module, '--output', output, *args],
+                       check=True, stdout=subprocess.DEVNULL)
+        return load(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', default='0.05', help="stand-in upstream latency in seconds")
+    parser.add_argument('--quick', action='store_true', help="fewer iterations, for a smoke run")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    upstream = ['--latency', args.latency, '--seed', '1']
+    results = {}
+    results.update(run_benchmark('bench.bench_parse', ['--number', '20'] if args.quick else []))
+    results.update(run_benchmark('bench.bench_convert', ['--size', '10000'] if args.quick else []))
+    results.update(run_benchmark('bench.bench_aggregate',
+                                 upstream + (['--iterations', '5'] if args.quick else [])))
+    results.update(run_benchmark('bench.bench_api',
+                                 upstream + (['--requests', '300'] if args.quick else [])))
+    report('all', results, args.save, args.compare, args.output)
+
+
+if __name__ == '__main__':
+    main()
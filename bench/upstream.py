@@ -0,0 +1,164 @@
+"""Local stand-in for the VCB, Agribank and DOJI endpoints.
+
+Serves the recorded fixtures over HTTP with configurable latency, jitter
+and failure injection, and answers If-None-Match with 304 like a real
+server, so the scrapers, cache and API can be measured without touching
+the bank sites. Run it on its own with
+
+    python -m bench.upstream --port 8765 --latency 0.2 --jitter 0.05 --failure-rate 0.1
+
+or use StandInUpstream from another benchmark.
+"""
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraper import agribank, doji_gold, vcb
+from scraper.http_client import reset_validators
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# URL path -> (fixture file, content type)
+ROUTES = {
+    '/vcb.xml': ('vcb.xml', 'text/xml; charset=utf-8'),
+    '/agribank.html': ('agribank.html', 'text/html; charset=utf-8'),
+    '/doji.xml': ('doji.xml', 'text/xml; charset=utf-8'),
+}
+
+
+class StandInUpstream:
+    """Threaded HTTP server playing the part of the three upstream sites.
+
+    Every response waits ``latency +/- jitter`` seconds first, and a
+    ``failure_rate`` fraction of requests get a 503 instead of the fixture.
+    """
+
+    def __init__(self, fixtures=FIXTURES, latency=0.0, jitter=0.0, failure_rate=0.0,
+                 host='127.0.0.1', port=0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'failures': 0, 'not_modified': 0}
+        self._lock = threading.Lock()
+
+        self.bodies = {}
+        for path, (filename, content_type) in ROUTES.items():
+            with open(os.path.join(fixtures, filename), 'rb') as f:
+                body = f.read()
+            etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            self.bodies[path] = (body, content_type, etag)
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _delay(self):
+        with self._lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def _should_fail(self):
+        with self._lock:
+            return self.random.random() < self.failure_rate
+
+    def _count(self, field):
+        with self._lock:
+            self.stats[field] += 1
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                upstream._count('requests')
+                time.sleep(upstream._delay())
+
+                route = upstream.bodies.get(self.path.split('?', 1)[0])
+                if route is None:
+                    return self._send(404, b'not found', 'text/plain')
+                if upstream._should_fail():
+                    upstream._count('failures')
+                    return self._send(503, b'injected failure', 'text/plain')
+
+                body, content_type, etag = route
+                if self.headers.get('If-None-Match') == etag:
+                    upstream._count('not_modified')
+                    return self._send(304, b'', content_type, etag)
+                self._send(200, body, content_type, etag)
+
+            def _send(self, status, body, content_type, etag=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='stand-in-upstream',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def point_scrapers_at(base_url):
+    """Send the scrapers in this process to ``base_url`` instead of the banks"""
+    vcb.VCB_URL = f"{base_url}/vcb.xml"
+    agribank.AGRIBANK_URL = f"{base_url}/agribank.html"
+    doji_gold.DOJI_URL = f"{base_url}/doji.xml"
+    reset_validators()
+
+
+def add_upstream_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per upstream response")
+    parser.add_argument('--jitter', type=float, default=0.02, help="+/- seconds of random latency")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument('--seed', type=int, default=None, help="seed for latency and failure injection")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    upstream = StandInUpstream(latency=args.latency, jitter=args.jitter,
+                               failure_rate=args.failure_rate, port=args.port, seed=args.seed)
+    print(f"Serving fixtures on {upstream.url} ({', '.join(ROUTES)}); Ctrl+C to stop")
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
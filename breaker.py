@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failures that open a source's circuit
+FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURES', 3))
+
+# Seconds an open circuit waits before probing, doubled on every failed
+# probe up to the maximum
+BASE_BACKOFF = float(os.environ.get('BREAKER_BACKOFF', 30))
+MAX_BACKOFF = float(os.environ.get('BREAKER_MAX_BACKOFF', 600))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a source whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Failure tracking for one upstream source.
+
+    The circuit is closed while the source works. After ``threshold``
+    consecutive failures (an exception or an empty result) it opens and
+    calls are refused without touching the network for ``backoff`` seconds.
+    Then one probe call is let through (half-open): success closes the
+    circuit, failure opens it again for twice as long, up to
+    ``max_backoff``.
+    """
+
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, base_backoff=BASE_BACKOFF,
+                 max_backoff=MAX_BACKOFF):
+        self.name = name
+        self.threshold = threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.failures = 0
+        self.last_error = None
+        self._opened = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def retry_in(self):
+        """Seconds until an open circuit lets a probe through (0 otherwise)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def allow(self):
+        """True if a call may go to the source now.
+
+        An open circuit whose backoff has passed turns half-open and admits
+        exactly one caller; everyone else is refused until that probe ends.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self._retry_at:
+                self.state = HALF_OPEN
+                logger.info(f"Probing {self.name} after {self._backoff():.0f}s backoff")
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} recovered, closing its circuit")
+            self.state = CLOSED
+            self.failures = 0
+            self._opened = 0
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) or type(error).__name__
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self._opened += 1
+                self.state = OPEN
+                self._retry_at = time.monotonic() + self._backoff()
+                logger.warning(
+                    f"{self.name} failed {self.failures} time(s) in a row, "
+                    f"skipping it for {self._backoff():.0f}s: {self.last_error}"
+                )
+
+    def _backoff(self):
+        return min(self.max_backoff, self.base_backoff * 2 ** max(0, self._opened - 1))
+
+    def _check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open, retrying in {self.retry_in:.0f}s")
+
+    def _record(self, value):
+        if value:
+            self.record_success()
+        else:
+            self.record_failure('no data returned')
+        return value
+
+    def call(self, fetch):
+        """Call ``fetch()`` through the breaker, recording the outcome"""
+        self._check()
+        try:
+            value = fetch()
+        except BaseException as e:
+            self.record_failure(e)
+            raise
+        return self._record(value)
+
+    async def call_async(self, fetch):
+        """Await ``fetch()`` through the breaker, recording the outcome"""
+        self._check()
+        try:
+            value = await fetch()
+        except BaseException as e:
+            # Includes cancellation at a fan-out deadline, so a timed-out
+            # probe cannot leave the circuit half-open forever
+            self.record_failure(e)
+            raise
+        return self._record(value)
+
+    def health(self):
+        """JSON-friendly state, published with snapshots as per-source health"""
+        return {
+            'circuit': self.state,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'retry_at': time.time() + self.retry_in if self.state == OPEN else None,
+        }
@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('value', 'fetched_at', 'last_access')
+
+    def __init__(self, value, fetched_at):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.last_access = fetched_at
+
+
+class TTLCache:
+    """Per-source TTL cache with stale-while-revalidate semantics.
+
+    A fresh entry is returned straight from memory. Once its TTL has passed
+    the entry is still served for up to ``stale_ttl`` seconds while a single
+    background thread refreshes it. Concurrent misses for a key are
+    coalesced into one fetch (see ``flight.stats``). Entries older than ``ttl + stale_ttl``
+    are evicted, and the least recently used entry is dropped when the cache
+    grows past ``max_entries``.
+    """
+
+    def __init__(self, ttls=None, default_ttl=300, stale_ttl=3600, max_entries=32):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.flight = SingleFlight()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'evictions': 0}
+
+    def ttl_for(self, key):
+        return self.ttls.get(key, self.default_ttl)
+
+    def get(self, key, fetch):
+        """Return the cached value for ``key``, calling ``fetch()`` when needed"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_access = now
+                age = now - entry.fetched_at
+                ttl = self.ttl_for(key)
+                if age < ttl:
+                    self.stats['hits'] += 1
+                    return entry.value
+                if age < ttl + self.stale_ttl:
+                    self.stats['stale_hits'] += 1
+                    stale_value = entry.value
+                else:
+                    stale_value = None
+            else:
+                stale_value = None
+
+        if stale_value is not None:
+            self._refresh_in_background(key, fetch)
+            return stale_value
+
+        return self._fetch(key, fetch)
+
+    def put(self, key, value):
+        """Store ``value`` for ``key`` as freshly fetched"""
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = _Entry(value, now)
+            self._evict(now)
+
+    def peek(self, key):
+        """Return the cached value for ``key`` without fetching, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def age(self, key):
+        """Seconds since ``key`` was last fetched, or None if not cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return time.monotonic() - entry.fetched_at
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _fetch(self, key, fetch):
+        # Concurrent misses for the same key share one upstream fetch
+        return self.flight.do(key, lambda: self._fetch_and_store(key, fetch))
+
+    def _fetch_and_store(self, key, fetch):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.fetched_at < self.ttl_for(key):
+                self.stats['hits'] += 1
+                return entry.value
+            self.stats['misses'] += 1
+
+        value = fetch()
+        # Empty results usually mean the upstream failed, so retry next time
+        if value:
+            self.put(key, value)
+        return value
+
+    def _refresh_in_background(self, key, fetch):
+        if self.flight.in_flight(key):
+            return  # a fetch for this key is already running
+
+        def refresh():
+            try:
+                value = self.flight.do(key, fetch)
+                if value:
+                    self.put(key, value)
+                    with self._lock:
+                        self.stats['refreshes'] += 1
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {str(e)}")
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{key}", daemon=True).start()
+
+    def _evict(self, now):
+        # Caller holds self._lock
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if now - entry.fetched_at >= self.ttl_for(key) + self.stale_ttl:
+                del self._entries[key]
+                self.stats['evictions'] += 1
+
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k].last_access)
+            del self._entries[oldest]
+            self.stats['evictions'] += 1
@@ -0,0 +1,122 @@
+"""Batch conversion between VND, the bank currencies and domestic gold.
+
+Every instrument gets an index: VND, each currency the banks quote and
+each domestic gold price (``GOLD:<DOJI key>``, in taels). For every bank,
+and for the best rates across banks, ``matrix[bank, i, j]`` is how many
+units of j one unit of i buys: i is sold for VND at its buy rate and the
+VND buys j at its sell rate, so cross rates such as EUR -> JPY go through
+VND like a real exchange. Gold is always priced by its own source,
+whichever bank handles the currency leg.
+
+The matrix is built once per snapshot (see ``MarketView.rate_table``), so
+a batch of conversions is one NumPy gather and one multiply.
+"""
+import numpy as np
+
+from analytics import vnd_per_tael
+
+# Bank name meaning the highest buy and lowest sell rate of any bank
+BEST = 'best'
+
+GOLD_PREFIX = 'GOLD:'
+
+
+class RateTable:
+    """Conversion rates between every pair of instruments, per bank"""
+
+    def __init__(self, currency_rates, gold_rates):
+        by_bank = {}
+        for rate in currency_rates:
+            by_bank.setdefault(rate.bank, {})[rate.currency] = rate
+        gold = [rate for rate in gold_rates
+                if rate.category == 'domestic' and rate.unit == 'VND/tael' and rate.key]
+
+        self.instruments = (['VND'] + sorted({rate.currency for rate in currency_rates})
+                            + [GOLD_PREFIX + rate.key.upper() for rate in gold])
+        self.index = {code: i for i, code in enumerate(self.instruments)}
+        self.banks = [BEST] + list(by_bank)
+        self._bank_index = {bank.lower(): i for i, bank in enumerate(self.banks)}
+
+        # VND received for one unit (bid) and paid for one unit (ask); NaN
+        # where the instrument is not quoted or has no price on that side
+        shape = (len(self.banks), len(self.instruments))
+        bid = np.full(shape, np.nan)
+        ask = np.full(shape, np.nan)
+        bid[:, 0] = ask[:, 0] = 1.0
+        for b, bank in enumerate(self.banks[1:], 1):
+            for currency, rate in by_bank[bank].items():
+                bid[b, self.index[currency]] = rate.buy or np.nan
+                ask[b, self.index[currency]] = rate.sell or np.nan
+        if len(self.banks) > 1:
+            bid[0] = np.fmax.reduce(bid[1:], axis=0)
+            ask[0] = np.fmin.reduce(ask[1:], axis=0)
+        for rate in gold:
+            i = self.index[GOLD_PREFIX + rate.key.upper()]
+            bid[:, i] = vnd_per_tael(rate.buy) if rate.buy else np.nan
+            ask[:, i] = vnd_per_tael(rate.sell) if rate.sell else np.nan
+
+        with np.errstate(invalid='ignore'):
+            self.matrix = bid[:, :, None] / ask[:, None, :]
+        diagonal = np.arange(len(self.instruments))
+        self.matrix[:, diagonal, diagonal] = 1.0
+
+    def bank_index(self, bank):
+        if not bank:
+            return 0
+        index = self._bank_index.get(str(bank).lower())
+        if index is None:
+            raise ValueError(f"Unknown bank {bank}. Valid banks: {', '.join(self.banks)}")
+        return index
+
+    def codes(self, values):
+        """Instrument indexes for a sequence of codes, resolving each distinct code once"""
+        lookup = {}
+        unknown = []
+        try:
+            for value in set(values):
+                index = self.index.get(value.strip().upper())
+                if index is None:
+                    unknown.append(value)
+                else:
+                    lookup[value] = index
+        except (AttributeError, TypeError):
+            raise ValueError("from and to must be instrument codes")
+        if unknown:
+            raise ValueError(f"Unknown instrument(s): {', '.join(sorted(unknown)[:10])}. "
+                             f"Valid instruments: {', '.join(self.instruments)}")
+        return np.fromiter(map(lookup.__getitem__, values), dtype=np.intp, count=len(values))
+
+    def convert(self, amounts, sources, targets, bank=None):
+        """Convert ``amounts[k]`` of ``sources[k]`` into ``targets[k]``.
+
+        Returns (results, rates) as float arrays; both are NaN where a leg
+        has no quote. Raises ValueError for unknown banks or instruments and
+        for amounts ``as_amounts`` rejects.
+        """
+        amounts = as_amounts(amounts)
+        if not len(amounts) == len(sources) == len(targets):
+            raise ValueError("amount, from and to must have the same length")
+
+        rates = self.matrix[self.bank_index(bank), self.codes(sources), self.codes(targets)]
+        return amounts * rates, rates
+
+
+def as_amounts(values):
+    """A flat float array of finite amounts; raises ValueError otherwise"""
+    try:
+        amounts = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("amount must be numeric")
+    if amounts.ndim != 1:
+        raise ValueError("amount must be a number or a flat list of numbers")
+    if not np.isfinite(amounts).all():
+        raise ValueError("amount must be finite")
+    return amounts
+
+
+def to_list(values):
+    """A float array as a JSON-ready list, with NaN (no quote) as None"""
+    missing = np.isnan(values)
+    if missing.any():
+        return np.where(missing, None, values).tolist()
+    return values.tolist()
@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+from quotes import CurrencyQuote
+
+
+def rows_of(value):
+    """Quote rows of a published value: bank rows as-is, a GoldFeed's rates"""
+    if value is None:
+        return ()
+    return getattr(value, 'rates', value)
+
+
+def quote_key(row):
+    """(bank, currency) for bank rates, (category, key) for gold rates, whose
+    keys can repeat across categories"""
+    if isinstance(row, CurrencyQuote):
+        return (row.bank, row.currency)
+    return (row.category, row.instrument)
+
+
+def _delta(old, new):
+    if old is None or new is None:
+        return None
+    return round(new - old, 6)
+
+
+class Change(namedtuple('Change', ['source', 'key', 'old', 'new'])):
+    """One quote that was added, changed or removed between two scrapes.
+
+    ``old`` and ``new`` are the rows from the previous and the current
+    scrape; ``old`` is None for an added quote and ``new`` for a removed one.
+    """
+    __slots__ = ()
+
+    @property
+    def kind(self):
+        if self.old is None:
+            return 'added'
+        if self.new is None:
+            return 'removed'
+        return 'changed'
+
+    @property
+    def row(self):
+        return self.new if self.new is not None else self.old
+
+    def as_dict(self):
+        row = self.row
+        old_buy, old_sell = (self.old.buy, self.old.sell) if self.old is not None else (None, None)
+        buy, sell = (self.new.buy, self.new.sell) if self.new is not None else (None, None)
+        event = {
+            'source': self.source,
+            'kind': self.kind,
+            'old_buy': old_buy,
+            'old_sell': old_sell,
+            'buy': buy,
+            'sell': sell,
+            'buy_delta': _delta(old_buy, buy),
+            'sell_delta': _delta(old_sell, sell),
+        }
+        if isinstance(row, CurrencyQuote):
+            event['bank'] = row.bank
+            event['currency'] = row.currency
+        else:
+            event['key'] = row.instrument
+            event['name'] = row.name
+            event['category'] = row.category
+            event['unit'] = row.unit
+        return event
+
+
+def diff_rows(source, old_rows, new_rows):
+    """Changes from ``old_rows`` to ``new_rows``, in the order of the new rows.
+
+    Quotes are matched by ``quote_key`` and compared on buy/sell only, so a
+    new ``last_updated`` stamp with the same prices is not a change.
+    """
+    previous = {quote_key(row): row for row in old_rows}
+    changes = []
+    for row in new_rows:
+        key = quote_key(row)
+        old = previous.pop(key, None)
+        if old is None or (old.buy, old.sell) != (row.buy, row.sell):
+            changes.append(Change(source, key, old, row))
+
+    for key, old in previous.items():
+        changes.append(Change(source, key, old, None))
+    return changes
+
+
+def diff_values(source, old_value, new_value):
+    """Changes between two published values (row lists or GoldFeeds) of a source"""
+    if old_value is new_value:
+        return []
+    return diff_rows(source, rows_of(old_value), rows_of(new_value))
+
+
+def diff_data(old_data, new_data):
+    """Changes across every source in two snapshot data mappings"""
+    changes = []
+    for source, value in new_data.items():
+        changes.extend(diff_values(source, old_data.get(source), value))
+    return changes
@@ -0,0 +1,62 @@
+import numpy as np
+
+# Bucket sizes accepted by the history endpoints, in seconds
+INTERVALS = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+
+
+def ohlc(times, values, bucket, carried=0):
+    """Aggregate a time-sorted series into OHLC buckets of ``bucket`` seconds.
+
+    Returns a dict of parallel lists (time, open, high, low, close, count),
+    one entry per bucket that holds at least one observation. The first
+    ``carried`` points only seed the prices and are left out of count.
+    Everything is computed with vectorized NumPy, so a year of raw points
+    reduces in one pass without a Python-level loop.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if times.size == 0:
+        return {'time': [], 'open': [], 'high': [], 'low': [], 'close': [], 'count': []}
+
+    buckets = np.floor(times / bucket) * bucket
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], times.size)
+    counts = ends - starts
+    counts[0] -= carried
+
+    return {
+        'time': buckets[starts].tolist(),
+        'open': values[starts].tolist(),
+        'high': np.maximum.reduceat(values, starts).tolist(),
+        'low': np.minimum.reduceat(values, starts).tolist(),
+        'close': values[ends - 1].tolist(),
+        'count': counts.tolist(),
+    }
+
+
+def history_ohlc(store, source, instrument, start, end, interval, category=''):
+    """OHLC buckets for the buy and sell side of one stored instrument.
+
+    Only changed quotes are stored, so the last quote before ``start`` is
+    carried in as the opening value of the first bucket.
+    """
+    bucket = INTERVALS[interval]
+    rows = store.history(source, instrument, start, end, category)
+    previous = store.last_before(source, instrument, start, category)
+    carried = 0
+    if previous is not None:
+        rows = [(start, previous[1], previous[2])] + rows
+        carried = 1
+
+    if not rows:
+        return None
+
+    data = np.array(rows, dtype=np.float64)
+    return {
+        'buy': ohlc(data[:, 0], data[:, 1], bucket, carried),
+        'sell': ohlc(data[:, 0], data[:, 2], bucket, carried),
+    }
@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Production server: python app.py is only meant for local development
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+timeout = 60
+accesslog = '-'
+
+# Workers share one scraped snapshot: whichever worker holds the lock next
+# to this file polls the banks, the others just read what it publishes. The
+# file lives in a fresh 0700 directory so no other local user can plant or
+# replace it; workers inherit the path through the environment.
+_snapshot_dir = None
+if not os.environ.get('SHARED_SNAPSHOT'):
+    _snapshot_dir = tempfile.mkdtemp(prefix='fx-rate-')
+    os.environ['SHARED_SNAPSHOT'] = os.path.join(_snapshot_dir, 'snapshot.json')
+
+
+def on_exit(server):
+    if _snapshot_dir is not None:
+        shutil.rmtree(_snapshot_dir, ignore_errors=True)
@@ -1,58 +1,76 @@
-from scraper.vcb import get_vcb_rates
-from scraper.agribank import get_agribank_rates
-from scraper.doji_gold import get_doji_gold_rates, get_gold_charts
+from scraper import registry
+from scraper.http_client import run_sync
+from aggregator import fetch_all_async
+from analytics import MarketAnalytics
+from convert import RateTable
 from colorama import Fore, Style, init
 import argparse
+import csv
 import sys
 
 # Initialize colorama for Windows compatibility
 init()
 
-def display_currency_rates():
+def fetch_sources(names):
+    """Fetch the given sources concurrently on one event loop and return their results by name"""
+    return run_sync(fetch_all_async(registry.async_fetchers(names)))
+
+def currency_rates_from(results):
+    """Rows of every bank in ``results``, in registry order"""
+    return [rate for name in registry.names('currency') if name in results for rate in results[name].data]
+
+def gold_feeds_from(results):
+    """Feeds of every gold source in ``results`` that returned data"""
+    return [results[name].data for name in registry.names('gold') if name in results and results[name].data]
+
+def display_currency_rates(all_rates=None):
     """Display currency exchange rates"""
     print(f"{Fore.CYAN}{'='*60}")
     print(f"           CURRENCY EXCHANGE RATES")
     print(f"{'='*60}{Style.RESET_ALL}")
     
-    all_rates = get_vcb_rates() + get_agribank_rates()
+    if all_rates is None:
+        all_rates = currency_rates_from(fetch_sources(registry.names('currency')))
     
     if not all_rates:
         print(f"{Fore.RED}No currency rates available{Style.RESET_ALL}")
         return
     
-    currencies = ['USD', 'EUR', 'JPY', 'CNY']
-    for currency in currencies:
+    analytics = MarketAnalytics(all_rates, [])
+    for currency in registry.instruments('currency'):
         print(f"\n{Fore.YELLOW}Currency: {currency}{Style.RESET_ALL}")
         print("| Bank       | Buy       | Sell      |")
         print("|------------|-----------|-----------|")
         
-        bank_rates = [r for r in all_rates if r['currency'] == currency]
+        entry = analytics.currencies.get(currency)
         
-        if not bank_rates:
+        if not entry:
             print(f"| {Fore.RED}No data available for {currency}{Style.RESET_ALL}")
             continue
             
-        max_buy = max(bank_rates, key=lambda x: x['buy'])['buy']
-        min_sell = min(bank_rates, key=lambda x: x['sell'])['sell']
+        max_buy = entry['best']['buy']['rate']
+        min_sell = entry['best']['sell']['rate']
 
-        for rate in bank_rates:
-            buy = f"{rate['buy']:,.2f}"
-            sell = f"{rate['sell']:,.2f}"
-            bank_name = rate['bank']
+        for quote in entry['quotes']:
+            buy = f"{quote['buy']:,.2f}"
+            sell = f"{quote['sell']:,.2f}"
+            bank_name = quote['bank']
             
-            if rate['buy'] == max_buy:
+            if quote['buy'] == max_buy:
                 buy = Fore.GREEN + buy + Style.RESET_ALL + " ⭐"
-            if rate['sell'] == min_sell:
+            if quote['sell'] == min_sell:
                 sell = Fore.RED + sell + Style.RESET_ALL + " ⭐"
             print(f"| {bank_name:10} | {buy:>9} | {sell:>9} |")
 
-def display_gold_rates():
+def display_gold_rates(gold_rates=None):
     """Display gold prices"""
     print(f"{Fore.CYAN}{'='*80}")
     print(f"                    GOLD PRICES")
     print(f"{'='*80}{Style.RESET_ALL}")
     
-    gold_rates = get_doji_gold_rates()
+    if gold_rates is None:
+        feeds = gold_feeds_from(fetch_sources(registry.names('gold')))
+        gold_rates = [rate for feed in feeds for rate in feed.rates]
     
     if not gold_rates:
         print(f"{Fore.RED}No gold rates available{Style.RESET_ALL}")
@@ -61,7 +79,7 @@ def display_gold_rates():
     # Group by category
     categories = {}
     for rate in gold_rates:
-        category = rate['category']
+        category = rate.category
         if category not in categories:
             categories[category] = []
         categories[category].append(rate)
@@ -73,10 +91,10 @@ def display_gold_rates():
         print("|--------------------------|------------|------------|-----------|")
         
         for rate in categories['domestic']:
-            name = rate['name'][:24]  # Truncate long names
-            buy = f"{rate['buy']:,.0f}" if rate['buy'] > 0 else "-"
-            sell = f"{rate['sell']:,.0f}" if rate['sell'] > 0 else "-"
-            unit = rate['unit']
+            name = rate.name[:24]  # Truncate long names
+            buy = f"{rate.buy:,.0f}" if rate.buy > 0 else "-"
+            sell = f"{rate.sell:,.0f}" if rate.sell > 0 else "-"
+            unit = rate.unit
             print(f"| {name:24} | {buy:>10} | {sell:>10} | {unit:9} |")
     
     # Display international gold prices
@@ -86,10 +104,10 @@ def display_gold_rates():
         print("|--------------------------|------------|------------|-----------|")
         
         for rate in categories['international']:
-            name = rate['name'][:24]
-            buy = f"{rate['buy']:,.0f}" if rate['buy'] > 0 else "-"
-            sell = f"{rate['sell']:,.0f}" if rate['sell'] > 0 else "-"
-            unit = rate['unit']
+            name = rate.name[:24]
+            buy = f"{rate.buy:,.0f}" if rate.buy > 0 else "-"
+            sell = f"{rate.sell:,.0f}" if rate.sell > 0 else "-"
+            unit = rate.unit
             print(f"| {name:24} | {buy:>10} | {sell:>10} | {unit:9} |")
     
     # Display jewelry prices
@@ -98,13 +116,13 @@ def display_gold_rates():
         print("| Name                     | Buy        | Sell       | Unit      |")
         print("|--------------------------|------------|------------|-----------|")
         
-        jewelry_rates = sorted(categories['gold_jewelry'], key=lambda x: x['sell'] if x['sell'] > 0 else x['buy'], reverse=True)
+        jewelry_rates = sorted(categories['gold_jewelry'], key=lambda x: x.sell if x.sell > 0 else x.buy, reverse=True)
         
         for rate in jewelry_rates:
-            name = rate['name'][:24]
-            buy = f"{rate['buy']:,.0f}" if rate['buy'] > 0 else "-"
-            sell = f"{rate['sell']:,.0f}" if rate['sell'] > 0 else "-"
-            unit = rate['unit']
+            name = rate.name[:24]
+            buy = f"{rate.buy:,.0f}" if rate.buy > 0 else "-"
+            sell = f"{rate.sell:,.0f}" if rate.sell > 0 else "-"
+            unit = rate.unit
             
             # Highlight pure gold (24k, 9999)
             if '24k' in name.lower() or '9999' in name.lower():
@@ -112,13 +130,15 @@ def display_gold_rates():
             
             print(f"| {name:24} | {buy:>10} | {sell:>10} | {unit:9} |")
 
-def display_gold_charts():
+def display_gold_charts(charts=None):
     """Display available gold charts"""
     print(f"{Fore.CYAN}{'='*60}")
     print(f"           GOLD PRICE CHARTS")
     print(f"{'='*60}{Style.RESET_ALL}")
     
-    charts = get_gold_charts()
+    if charts is None:
+        feeds = gold_feeds_from(fetch_sources(registry.names('gold')))
+        charts = [chart for feed in feeds for chart in feed.charts]
     
     if not charts:
         print(f"{Fore.RED}No gold charts available{Style.RESET_ALL}")
@@ -129,34 +149,81 @@ def display_gold_charts():
         print(f"   Type: {chart['type']}")
         print(f"   URL:  {chart['url']}")
 
-def display_summary():
+def display_summary(currency_rates=None, gold_rates=None):
     """Display a summary of all data"""
     print(f"{Fore.MAGENTA}{'='*80}")
     print(f"                    MARKET SUMMARY")
     print(f"{'='*80}{Style.RESET_ALL}")
     
+    if currency_rates is None or gold_rates is None:
+        results = fetch_sources(registry.names())
+        currency_rates = currency_rates_from(results)
+        gold_rates = [rate for feed in gold_feeds_from(results) for rate in feed.rates]
+    
+    analytics = MarketAnalytics(currency_rates, gold_rates)
+    
     # Currency summary
-    currency_rates = get_vcb_rates() + get_agribank_rates()
     print(f"\n{Fore.CYAN}💱 Currency Exchange Rates:{Style.RESET_ALL} {len(currency_rates)} rates available")
     
-    if currency_rates:
-        # Show USD as primary indicator
-        usd_rates = [r for r in currency_rates if r['currency'] == 'USD']
-        if usd_rates:
-            avg_buy = sum(r['buy'] for r in usd_rates) / len(usd_rates)
-            avg_sell = sum(r['sell'] for r in usd_rates) / len(usd_rates)
-            print(f"   USD Average: Buy {avg_buy:,.0f} | Sell {avg_sell:,.0f}")
+    # Show USD as primary indicator
+    usd = analytics.currencies.get('USD')
+    if usd:
+        print(f"   USD Average: Buy {usd['buy']['mean']:,.0f} | Sell {usd['sell']['mean']:,.0f}")
+        print(f"   USD Best:    Buy {usd['best']['buy']['rate']:,.0f} ({usd['best']['buy']['bank']}) | "
+              f"Sell {usd['best']['sell']['rate']:,.0f} ({usd['best']['sell']['bank']})")
     
     # Gold summary
-    gold_rates = get_doji_gold_rates()
     print(f"\n{Fore.YELLOW}🏆 Gold Prices:{Style.RESET_ALL} {len(gold_rates)} prices available")
     
     if gold_rates:
         # Find 24k gold price
-        gold_24k = [r for r in gold_rates if '24k' in r['name'].lower()]
+        gold_24k = [r for r in gold_rates if '24k' in r.name.lower()]
         if gold_24k:
             rate = gold_24k[0]
-            print(f"   24k Gold: Buy {rate['buy']:,.0f} | Sell {rate['sell']:,.0f} ({rate['unit']})")
+            print(f"   24k Gold: Buy {rate.buy:,.0f} | Sell {rate.sell:,.0f} ({rate.unit})")
+    
+    premium = analytics.gold_premium
+    if premium:
+        print(f"   World Gold:  {premium['world_usd_per_ounce']:,.1f} USD/oz = "
+              f"{premium['world_vnd_per_tael']:,.0f} VND/tael")
+        for quote in premium['quotes']:
+            print(f"   {quote['name'][:24]:24} premium {quote['premium']:+,.0f} VND ({quote['premium_pct']:+.2f}%)")
+
+def read_conversions(path):
+    """(amounts, from codes, to codes) from a CSV of amount,from,to rows; '-' reads stdin"""
+    f = sys.stdin if path == '-' else open(path, newline='')
+    with f:
+        rows = [row for row in csv.reader(f) if len(row) >= 3 and row[0].strip().lower() != 'amount']
+    return [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]
+
+def display_conversions(table, amounts, sources, targets, bank=None):
+    """Display conversions as a table"""
+    results, rates = table.convert(amounts, sources, targets, bank)
+    print(f"{Fore.CYAN}{'='*60}")
+    print(f"           CONVERSIONS ({bank or 'best rate'})")
+    print(f"{'='*60}{Style.RESET_ALL}")
+    
+    for amount, source, target, result, rate in zip(amounts, sources, targets, results, rates):
+        if result != result:  # NaN: one side has no quote
+            print(f"{float(amount):,.2f} {source.upper()} -> {Fore.RED}no rate for {target.upper()}{Style.RESET_ALL}")
+            continue
+        print(f"{float(amount):,.2f} {source.upper()} = {Fore.GREEN}{result:,.4f} {target.upper()}{Style.RESET_ALL}"
+              f"  (rate {rate:,.6f})")
+
+def write_conversions(table, amounts, sources, targets, bank=None, output=sys.stdout):
+    """Write conversions as CSV (amount,from,to,rate,result), empty where there is no rate"""
+    results, rates = table.convert(amounts, sources, targets, bank)
+    writer = csv.writer(output)
+    writer.writerow(['amount', 'from', 'to', 'rate', 'result'])
+    for row in zip(amounts, sources, targets, rates.tolist(), results.tolist()):
+        writer.writerow(['' if value != value else value for value in row])
+
+def display_source_status(results):
+    """Display per-source fetch status and timings"""
+    print(f"\n{Fore.CYAN}⏱  Sources:{Style.RESET_ALL}")
+    for name, result in results.items():
+        color = Fore.GREEN if result.ok else Fore.RED
+        print(f"   {name:12} {color}{result.status:8}{Style.RESET_ALL} {result.elapsed * 1000:8.0f} ms  {len(result.data)} rows")
 
 def main():
     """Main CLI interface"""
@@ -166,25 +233,66 @@ def main():
     parser.add_argument('--charts', action='store_true', help='Show gold chart URLs')
     parser.add_argument('--summary', '-s', action='store_true', help='Show market summary')
     parser.add_argument('--all', '-a', action='store_true', help='Show all data')
+    parser.add_argument('--convert', nargs=3, action='append', metavar=('AMOUNT', 'FROM', 'TO'),
+                        help='Convert an amount, e.g. --convert 100 USD EUR or --convert 1 GOLD:SJC USD (repeatable)')
+    parser.add_argument('--convert-file', metavar='CSV',
+                        help='Convert every amount,from,to row of a CSV file (- for stdin) and print CSV')
+    parser.add_argument('--bank', help='Bank for conversions (default: best rate across banks)')
     
     args = parser.parse_args()
     
     try:
+        no_args = not any(vars(args).values())
+        show_summary = args.summary or no_args
+        
+        # Fetch everything we are about to display in one concurrent round;
+        # gold prices and charts come from the same feed download
+        want_convert = args.convert or args.convert_file
+        want_currency = args.currency or args.all or show_summary or want_convert
+        want_gold = args.gold or args.all or args.charts or show_summary or want_convert
+        names = []
+        if want_currency:
+            names += registry.names('currency')
+        if want_gold:
+            names += registry.names('gold')
+        results = fetch_sources(names)
+        
+        currency_rates = gold_rates = charts = None
+        if want_currency:
+            currency_rates = currency_rates_from(results)
+        if want_gold:
+            feeds = gold_feeds_from(results)
+            gold_rates = [rate for feed in feeds for rate in feed.rates]
+            charts = [chart for feed in feeds for chart in feed.charts]
+        
         if args.currency or args.all:
-            display_currency_rates()
+            display_currency_rates(currency_rates)
         
         if args.gold or args.all:
-            display_gold_rates()
+            display_gold_rates(gold_rates)
         
         if args.charts:
-            display_gold_charts()
+            display_gold_charts(charts)
+        
+        if want_convert:
+            table = RateTable(currency_rates, gold_rates)
+            bank = args.bank
+            if bank and bank.lower() in registry.sources():
+                bank = registry.sources()[bank.lower()].label
+            if args.convert:
+                amounts, sources, targets = zip(*args.convert)
+                display_conversions(table, amounts, sources, targets, bank)
+            if args.convert_file:
+                write_conversions(table, *read_conversions(args.convert_file), bank)
+        
+        if show_summary:
+            display_summary(currency_rates, gold_rates)
         
-        if args.summary:
-            display_summary()
+        if args.all or show_summary:
+            display_source_status(results)
         
-        # If no arguments provided, show summary
-        if not any(vars(args).values()):
-            display_summary()
+        # If no arguments provided, point at the other options
+        if no_args:
             print(f"\n{Fore.CYAN}Use --help for more options{Style.RESET_ALL}")
             
     except KeyboardInterrupt:
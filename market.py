@@ -0,0 +1,66 @@
+import time
+from functools import cached_property
+
+from analytics import MarketAnalytics
+from convert import RateTable
+from scraper import registry
+
+
+class MarketView:
+    """Currency and gold data from one snapshot with lookup indexes prebuilt.
+
+    ``data`` maps a source name to what the scheduler published for it (rows
+    for currency sources, a feed with ``rates`` and ``charts`` for gold
+    sources). Grouping by currency and gold category happens once here, so
+    request handlers only do dictionary lookups.
+    """
+
+    def __init__(self, version, data, status=None, fetched_at=None, created_at=None):
+        self.version = version
+        # When the snapshot was published, so every view of it reports the same time
+        self.created_at = created_at or time.time()
+        self.data = dict(data)
+        self.status = dict(status or {})
+        self.fetched_at = dict(fetched_at or {})
+
+        self.currency_rates = []
+        for name in registry.names('currency'):
+            self.currency_rates.extend(self.data.get(name) or ())
+
+        self.gold_rates = []
+        self.charts = []
+        for name in registry.names('gold'):
+            feed = self.data.get(name)
+            if feed:
+                self.gold_rates.extend(feed.rates)
+                self.charts.extend(feed.charts)
+
+        self.by_currency = {}
+        for rate in self.currency_rates:
+            self.by_currency.setdefault(rate.currency, []).append(rate)
+
+        self.by_category = {}
+        for rate in self.gold_rates:
+            self.by_category.setdefault(rate.category, []).append(rate)
+
+    @cached_property
+    def analytics(self):
+        """Best rates, spreads and the gold premium, computed on first use"""
+        return MarketAnalytics(self.currency_rates, self.gold_rates)
+
+    @cached_property
+    def rate_table(self):
+        """Conversion matrix between VND, currencies and gold, built on first use"""
+        return RateTable(self.currency_rates, self.gold_rates)
+
+    def has(self, name):
+        return name in self.data
+
+    def merged(self, data, status):
+        """A new view with extra sources added on top of this one"""
+        return MarketView(
+            self.version,
+            {**self.data, **data},
+            {**self.status, **status},
+            self.fetched_at,
+        )
@@ -0,0 +1,182 @@
+"""Minimal Prometheus-style metrics with no third-party dependency.
+
+Metrics live in the process that records them; with several gunicorn
+workers each one reports its own numbers (upstream fetches only happen
+in the worker that polls). ``render()`` produces the text exposition
+format served at /metrics.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, from cache-speed lookups to slow upstreams
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named family of samples keyed by label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def set(self, value, **labels):
+        """Overwrite a sample, e.g. to mirror a counter kept elsewhere"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            yield self.name, key, None, value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labels, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in sorted(items):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", key, ('le', _format_value(bound)), cumulative
+            yield f"{self.name}_bucket", key, ('le', '+Inf'), count
+            yield f"{self.name}_sum", key, None, total
+            yield f"{self.name}_count", key, None, count
+
+
+class Registry:
+    """Every metric in the process plus callbacks run just before rendering.
+
+    Collectors copy numbers that are tracked elsewhere (cache stats, breaker
+    state, snapshot age) into gauges and counters, so hot paths that already
+    count things do not have to count twice.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def collector(self, fn):
+        """Call ``fn()`` before every render; usable as a decorator"""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+        for fn in collectors:
+            fn()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Upstream fetches, recorded by scraper.http_client
+FETCH_SECONDS = Histogram('fx_fetch_seconds', 'Upstream HTTP request duration', ['source', 'status'])
+FETCH_BYTES = Counter('fx_fetch_bytes_total', 'Response body bytes downloaded from upstreams', ['source'])
+PARSE_SECONDS = Histogram('fx_parse_seconds', 'Time spent parsing an upstream response', ['source'])
+SOURCE_ROWS = Gauge('fx_source_rows', 'Rows produced by the last parse of each source', ['source'])
+
+# Serving, recorded by responses.py and the web apps
+SERIALIZE_SECONDS = Histogram('fx_serialize_seconds', 'Time to build and serialize a cached response body', ['key'])
+REQUEST_SECONDS = Histogram('fx_http_request_seconds', 'API request latency', ['endpoint', 'method', 'status'])
+
+# Mirrored from state kept elsewhere by the collectors in app.py
+CACHE_EVENTS = Counter('fx_cache_events_total', 'TTL cache lookups and maintenance by outcome', ['event'])
+SINGLEFLIGHT_CALLS = Counter('fx_singleflight_calls_total', 'Cache fetches run vs joined while in flight', ['source', 'role'])
+CONDITIONAL_FETCHES = Counter('fx_conditional_fetches_total', 'Upstream responses by revalidation outcome', ['result'])
+SNAPSHOT_VERSION = Gauge('fx_snapshot_version', 'Version of the snapshot this process serves')
+SNAPSHOT_AGE = Gauge('fx_snapshot_age_seconds', 'Seconds since the served snapshot was published')
+SOURCE_AGE = Gauge('fx_source_data_age_seconds', 'Seconds since each source last published changed data', ['source'])
+SOURCE_POLL_AGE = Gauge('fx_source_poll_age_seconds', 'Seconds since each source was last polled successfully', ['source'])
+CIRCUIT_STATE = Gauge('fx_circuit_state', 'Circuit breaker state per source (1 for the current state)', ['source', 'state'])
+CIRCUIT_FAILURES = Gauge('fx_circuit_failures', 'Consecutive failures per source', ['source'])
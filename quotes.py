@@ -0,0 +1,85 @@
+"""Compact quote rows shared by the scrapers, snapshots, cache and history.
+
+Each quote is a slotted tuple rather than a dict, and the strings that
+repeat across rows and scrapes (bank, currency, category, unit, gold names
+and the feed timestamp) are interned, so every row and every snapshot
+points at one copy of them. Rows only become dicts where they leave the
+process: JSON responses and stream events, via ``as_dicts``.
+"""
+import sys
+from collections import namedtuple
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class CurrencyQuote(namedtuple('CurrencyQuote', ['bank', 'currency', 'buy', 'sell'])):
+    """One bank's buy and sell rate for a currency, in VND"""
+    __slots__ = ()
+
+    # Gold-only fields, so history and diffs can treat every quote alike
+    category = None
+    last_updated = None
+
+    @classmethod
+    def create(cls, bank, currency, buy, sell):
+        return cls(_intern(bank), _intern(currency), buy, sell)
+
+    @property
+    def instrument(self):
+        return self.currency
+
+    def as_dict(self):
+        return self._asdict()
+
+
+class GoldQuote(namedtuple('GoldQuote', ['type', 'category', 'name', 'original_name', 'key',
+                                         'buy', 'sell', 'unit', 'last_updated'])):
+    """One gold or jewelry price; ``unit`` says what buy and sell are quoted in"""
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, type, category, name, original_name, key, buy, sell, unit, last_updated):
+        return cls(_intern(type), _intern(category), _intern(name), _intern(original_name),
+                   _intern(key), buy, sell, _intern(unit), _intern(last_updated))
+
+    @property
+    def instrument(self):
+        """The feed's key for this price, falling back to its name"""
+        return self.key or self.original_name or self.name
+
+    def as_dict(self):
+        return self._asdict()
+
+
+class GoldFeed:
+    """A gold source's published data: its price rows and chart links.
+
+    Scrapers may return a subclass with feed-specific helpers; snapshots
+    shared between workers are decoded into this plain form.
+    """
+
+    def __init__(self, rates, charts):
+        self.rates = rates
+        self.charts = charts
+
+    def __eq__(self, other):
+        if not isinstance(other, GoldFeed):
+            return NotImplemented
+        return self.rates == other.rates and self.charts == other.charts
+
+    def __len__(self):
+        return len(self.rates)
+
+    def as_dict(self):
+        return {'rates': as_dicts(self.rates), 'charts': self.charts}
+
+    @classmethod
+    def from_dict(cls, value):
+        return cls([GoldQuote.create(**row) for row in value['rates']], value['charts'])
+
+
+def as_dicts(rows):
+    """JSON-ready dicts for a list of quotes"""
+    return [row.as_dict() for row in rows]
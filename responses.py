@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from flask import Response, request
+
+from metrics import SERIALIZE_SECONDS
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+# Seconds clients and proxies may reuse a response without revalidating
+MAX_AGE = int(os.environ.get('RESPONSE_MAX_AGE', 30))
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Content codings we serve; each gets its own ETag suffix ("<hash>-gzip")
+ENCODINGS = ('br', 'gzip')
+
+
+def dumps(payload):
+    """Serialize to compact, key-sorted JSON bytes (same layout as jsonify)"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def loads(body):
+    """Parse a JSON request body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class RenderedResponse:
+    """One serialized body plus its ETag and lazily built compressed forms"""
+
+    __slots__ = ('owner', 'body', 'etag', '_encoded', '_lock')
+
+    def __init__(self, owner, body):
+        self.owner = owner
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        with self._lock:
+            body = self._encoded.get(encoding)
+            if body is None:
+                if encoding == 'br':
+                    body = brotli.compress(self.body)
+                else:
+                    body = gzip.compress(self.body, compresslevel=6)
+                self._encoded[encoding] = body
+            return body
+
+
+class ResponseCache:
+    """JSON responses rendered once per snapshot view.
+
+    ``render(key, owner, build)`` returns the cached rendering for ``key`` as
+    long as it was produced for the same ``owner`` object (a MarketView);
+    a new snapshot means a new view, so the body is rebuilt on first use.
+    """
+
+    def __init__(self):
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def render(self, key, owner, build):
+        rendered = self._rendered.get(key)
+        if rendered is not None and rendered.owner is owner:
+            return rendered
+
+        with SERIALIZE_SECONDS.time(key=key):
+            rendered = RenderedResponse(owner, dumps(build()))
+        with self._lock:
+            self._rendered[key] = rendered
+        return rendered
+
+    def clear(self):
+        with self._lock:
+            self._rendered.clear()
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value names ``etag``, in any of its
+    encoded variants, or is ``*``"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        base, _, encoding = candidate.strip('"').partition('-')
+        if base == etag and (not encoding or encoding in ENCODINGS):
+            return True
+    return False
+
+
+def accepted_encodings(accept_encoding):
+    """Codings from an Accept-Encoding header value with a non-zero q"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def pick_encoding(accept_encoding):
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def negotiate(rendered, if_none_match=None, accept_encoding=None):
+    """(status, body, headers) for serving ``rendered`` to a client.
+
+    Works from the raw request header values so the Flask and ASGI apps
+    answer conditional and compressed requests identically. Each encoding
+    of the body has its own strong ETag.
+    """
+    body = rendered.body
+    encoding = pick_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_SIZE else None
+    etag = f'{rendered.etag}-{encoding}' if encoding else rendered.etag
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={MAX_AGE}',
+        'Vary': 'Accept-Encoding',
+    }
+
+    if etag_matches(if_none_match, rendered.etag):
+        return 304, b'', headers
+
+    if encoding:
+        body = rendered.encoded(encoding)
+        headers['Content-Encoding'] = encoding
+
+    return 200, body, headers
+
+
+def respond(rendered):
+    """Serve a RenderedResponse from Flask, answering 304 when the ETag matches"""
+    status, body, headers = negotiate(
+        rendered,
+        request.headers.get('If-None-Match'),
+        request.headers.get('Accept-Encoding'),
+    )
+    if status == 304:
+        return Response(status=304, headers=headers)
+    return Response(body, status=status, mimetype='application/json', headers=headers)
@@ -0,0 +1,305 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from breaker import OPEN, CircuitOpenError
+from diff import diff_values
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls of a source with no interval of its own; override
+# any source with REFRESH_INTERVAL_<NAME>
+DEFAULT_INTERVAL = 300
+
+# Seconds a follower waits for the leader's first poll of a source
+FOLLOWER_WAIT = float(os.environ.get('FOLLOWER_WAIT', 15))
+
+
+class Snapshot(namedtuple('Snapshot', ['version', 'created_at', 'data', 'fetched_at', 'health'])):
+    """Immutable view of the latest data and health published for every source"""
+    __slots__ = ()
+
+    def get(self, name, default=None):
+        return self.data.get(name, default)
+
+
+EMPTY_SNAPSHOT = Snapshot(0, 0.0, MappingProxyType({}), MappingProxyType({}), MappingProxyType({}))
+
+
+def interval_from_env(name, default):
+    value = os.environ.get(f"REFRESH_INTERVAL_{name.upper()}")
+    try:
+        return float(value) if value else default
+    except ValueError:
+        logger.warning(f"Ignoring invalid refresh interval for {name}: {value}")
+        return default
+
+
+class RefreshScheduler:
+    """Polls each source on its own interval and publishes immutable snapshots.
+
+    ``jobs`` maps a source name to its fetch function, which returns either a
+    list of rows or an object such as a GoldFeed. Each source runs in its
+    own daemon thread, sleeping ``interval * (1 +/- jitter)`` between polls so
+    the banks never see our requests in lockstep. A failed or empty poll
+    keeps the previously published value. A poll that returns exactly the
+    published value creates no new snapshot, so nothing downstream
+    (rendered responses, history, push streams) runs for it; it only moves
+    the source's unversioned ``polled_at`` time. The listeners (history,
+    push streams) only run when quotes change.
+
+    With ``shared`` (a SharedSnapshot) and ``leader_lock`` (a LeaderLock),
+    several worker processes can run a scheduler each: only the one holding
+    the lock polls the sources and writes snapshots to the shared file, and
+    the others read it. Followers keep retrying the lock so a new leader
+    takes over if the current one exits, and never poll a source themselves:
+    until the leader has published it they wait (see ``wait_for_publish``).
+
+    ``breakers`` maps a source name to its CircuitBreaker. A source whose
+    circuit is open is not polled until its backoff has passed, and every
+    change in its failure count is published in the snapshot's ``health``
+    so the last good data can be flagged as stale in all workers.
+    """
+
+    def __init__(self, jobs, intervals=None, jitter=0.1, cache=None, shared=None,
+                 leader_lock=None, election_interval=5.0, breakers=None, follower_wait=FOLLOWER_WAIT):
+        self.jobs = dict(jobs)
+        self.breakers = dict(breakers or {})
+        intervals = intervals or {}
+        self.intervals = {
+            name: interval_from_env(name, intervals.get(name, DEFAULT_INTERVAL)) for name in self.jobs
+        }
+        self.jitter = jitter
+        self.cache = cache
+        self._snapshot = EMPTY_SNAPSHOT
+        self._polled_at = {}
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._listeners = []
+        self.shared = shared
+        self.leader_lock = leader_lock
+        self.election_interval = election_interval
+        self.follower_wait = follower_wait
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    @property
+    def is_leader(self):
+        return self.leader_lock is None or self.leader_lock.held
+
+    @property
+    def is_follower(self):
+        """True in a worker that serves what another process polls"""
+        return self.shared is not None and self.running and not self.is_leader
+
+    def snapshot(self):
+        """Return the latest published snapshot.
+
+        In a single process this is a plain attribute read; followers also
+        pick up newer snapshots written by the leader process.
+        """
+        if self.shared is not None and not self.is_leader:
+            self._load_shared()
+        return self._snapshot
+
+    def polled_at(self):
+        """Time of the last successful poll per source, changed or not"""
+        self.snapshot()
+        return dict(self._polled_at)
+
+    def wait_for_publish(self, names, timeout=None):
+        """Block until the leader has polled each of ``names`` once.
+
+        A source counts as polled once its data or its health (a failed
+        poll) is in the snapshot. Gives up after ``timeout`` seconds
+        (default ``follower_wait``) and returns the latest snapshot either way.
+        """
+        deadline = time.monotonic() + (self.follower_wait if timeout is None else timeout)
+        while True:
+            snapshot = self.snapshot()
+            if self.is_leader or all(name in snapshot.data or name in snapshot.health for name in names):
+                return snapshot
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                return snapshot
+            time.sleep(min(self.shared.check_interval, remaining))
+
+    def _load_shared(self, force=False):
+        payload = self.shared.read_if_changed(force)
+        if payload is None:
+            return
+        with self._publish_lock:
+            self._polled_at.update(payload.get('polled_at', {}))
+            if payload['version'] > self._snapshot.version:
+                self._snapshot = Snapshot(
+                    payload['version'],
+                    payload['created_at'],
+                    MappingProxyType(payload['data']),
+                    MappingProxyType(payload['fetched_at']),
+                    MappingProxyType(payload.get('health', {})),
+                )
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        if self.leader_lock is None:
+            self._start_polling()
+        else:
+            thread = threading.Thread(target=self._elect, name='refresh-election', daemon=True)
+            self._threads = [thread]
+            thread.start()
+
+    def _start_polling(self):
+        threads = [
+            threading.Thread(target=self._run, args=(name,), name=f"refresh-{name}", daemon=True)
+            for name in self.jobs
+        ]
+        self._threads.extend(threads)
+        for thread in threads:
+            thread.start()
+        logger.info(f"Refresh scheduler started for {', '.join(self.jobs)}")
+
+    def _elect(self):
+        while not self._stop.is_set():
+            if self.leader_lock.try_acquire():
+                logger.info(f"Process {os.getpid()} is now polling sources for all workers")
+                # Continue from whatever the previous leader last published
+                self._load_shared(force=True)
+                self._start_polling()
+                return
+            self._stop.wait(self.election_interval)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self.leader_lock is not None:
+            self.leader_lock.release()
+
+    def subscribe(self, listener):
+        """Call ``listener(name, value, changes)`` after every publish.
+
+        ``changes`` is the list of diff.Change between the previous and the
+        new value; it is never empty.
+        """
+        self._listeners.append(listener)
+
+    def refresh(self, name):
+        """Poll one source now and publish the result; returns True on success"""
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            return self._poll(name)
+
+        before = (breaker.state, breaker.failures)
+        try:
+            return self._poll(name, breaker)
+        finally:
+            if (breaker.state, breaker.failures) != before:
+                self.publish_health(name, breaker.health())
+
+    def _poll(self, name, breaker=None):
+        try:
+            if breaker is None:
+                rows = self.jobs[name]()
+            else:
+                rows = breaker.call(self.jobs[name])
+        except CircuitOpenError as e:
+            logger.debug(str(e))
+            return False
+        except Exception as e:
+            logger.error(f"Scheduled refresh of {name} failed: {str(e)}")
+            return False
+
+        if not rows:
+            logger.warning(f"Scheduled refresh of {name} returned no data, keeping previous value")
+            return False
+
+        self.publish(name, rows)
+        return True
+
+    def publish(self, name, rows):
+        """Publish a new snapshot with ``rows`` as the data for ``name``.
+
+        Returns the changes in quotes against the previously published
+        value. A value equal to the published one only refreshes
+        ``polled_at``; any other value (even one whose quotes are unchanged,
+        such as a feed with new chart links) is published, but listeners
+        only run when there are changes.
+        """
+        if self.cache is not None:
+            self.cache.put(name, rows)
+
+        value = tuple(rows) if isinstance(rows, list) else rows
+        with self._publish_lock:
+            now = time.time()
+            self._polled_at[name] = now
+            current = self._snapshot
+            previous = current.data.get(name)
+            if previous == value:
+                logger.debug(f"No changes from {name}, keeping snapshot {current.version}")
+                self._write_shared()
+                return []
+
+            changes = diff_values(name, previous, value)
+            data = dict(current.data)
+            data[name] = value
+            fetched_at = dict(current.fetched_at)
+            fetched_at[name] = now
+            self._replace_snapshot(current, data=MappingProxyType(data),
+                                   fetched_at=MappingProxyType(fetched_at))
+
+        if not changes:
+            logger.debug(f"No quote changes from {name}")
+            return changes
+
+        logger.info(f"{len(changes)} quote(s) changed in {name}")
+        for listener in self._listeners:
+            try:
+                listener(name, rows, changes)
+            except Exception as e:
+                logger.error(f"Snapshot listener failed for {name}: {str(e)}")
+        return changes
+
+    def publish_health(self, name, health):
+        """Publish a new snapshot with ``health`` as the state of ``name``"""
+        with self._publish_lock:
+            current = self._snapshot
+            merged = dict(current.health)
+            merged[name] = health
+            self._replace_snapshot(current, health=MappingProxyType(merged))
+
+    def _replace_snapshot(self, current, **fields):
+        # Caller holds self._publish_lock
+        self._snapshot = current._replace(version=current.version + 1, created_at=time.time(), **fields)
+        self._write_shared()
+
+    def _write_shared(self):
+        # Caller holds self._publish_lock
+        if self.shared is not None:
+            try:
+                self.shared.write(*self._snapshot, polled_at=self._polled_at)
+            except Exception as e:
+                logger.error(f"Could not write shared snapshot: {str(e)}")
+
+    def _next_delay(self, name):
+        interval = self.intervals[name]
+        delay = max(1.0, interval * (1 + random.uniform(-self.jitter, self.jitter)))
+        breaker = self.breakers.get(name)
+        if breaker is not None and breaker.state == OPEN:
+            # Sleep through the backoff instead of waking up only to be refused
+            delay = max(delay, breaker.retry_in)
+        return delay
+
+    def _run(self, name):
+        while not self._stop.is_set():
+            self.refresh(name)
+            self._stop.wait(self._next_delay(name))
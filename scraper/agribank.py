@@ -1,35 +1,104 @@
-import requests
+import os
 from bs4 import BeautifulSoup
+from lxml import etree
+from quotes import CurrencyQuote
+from scraper.http_client import fetch_parsed, run_sync
+from scraper.registry import TARGET_CURRENCIES, Source
+
+AGRIBANK_URL = "https://www.agribank.com.vn/vn/ty-gia"
+
+# 'lxml' streams the page and stops at the rate table; 'bs4' builds the full DOM
+PARSER = os.environ.get('AGRIBANK_PARSER', 'lxml')
+
+# Characters fed to the streaming parser at a time
+CHUNK_SIZE = 16384
+
+async def get_agribank_rates_async():
+    return await fetch_parsed('agribank', AGRIBANK_URL, lambda res: parse_agribank_rates(res.text))
 
 def get_agribank_rates():
-    url = "https://www.agribank.com.vn/vn/ty-gia"
-    res = requests.get(url)
-    soup = BeautifulSoup(res.text, "html.parser")
+    return run_sync(get_agribank_rates_async())
+
+def parse_agribank_rates(html, parser=None):
+    if (parser or PARSER) == 'bs4':
+        return parse_agribank_rates_bs4(html)
+    return parse_agribank_rates_lxml(html)
+
+def parse_agribank_rates_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
 
     table = soup.find("table", class_="table")
     rows = table.find_all("tr")[1:]
-    target_currencies = ['USD', 'EUR', 'JPY', 'CNY']
     rates = []
 
     for row in rows:
-        cols = row.find_all("td")
-        if len(cols) < 4:
-            continue
-
-        currency = cols[0].text.strip()
-        if currency not in target_currencies:
-            continue
-
-        try:
-            buy = float(cols[1].text.replace(',', '').strip())
-            sell = float(cols[3].text.replace(',', '').strip())
-            rates.append({
-                'bank': 'Agribank',
-                'currency': currency,
-                'buy': buy,
-                'sell': sell
-            })
-        except:
-            continue
+        rate = _parse_row([col.text for col in row.find_all("td")])
+        if rate:
+            rates.append(rate)
 
     return rates
+
+def parse_agribank_rates_lxml(html):
+    """Stream the page through lxml and read only the first table.table.
+
+    Everything before the table is discarded as soon as it closes, and
+    parsing stops once the table ends, so the rest of the page is never
+    turned into a tree. Returns the same rows as the bs4 parser.
+    """
+    pull = etree.HTMLPullParser(events=('start', 'end'))
+    rates = []
+    depth = 0  # table nesting depth inside the rate table
+    first_row = True
+
+    for offset in range(0, len(html), CHUNK_SIZE):
+        pull.feed(html[offset:offset + CHUNK_SIZE])
+
+        for event, element in pull.read_events():
+            if event == 'start':
+                if element.tag == 'table' and (depth or 'table' in element.get('class', '').split()):
+                    depth += 1
+                continue
+
+            if not depth:
+                # Drop the element and every earlier sibling so the partial
+                # tree stays small however long the page is
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+                continue
+
+            if element.tag == 'table':
+                depth -= 1
+                if not depth:
+                    return rates
+            elif element.tag == 'tr':
+                if first_row:
+                    first_row = False
+                    continue
+                rate = _parse_row([''.join(td.itertext()) for td in element.iter('td')])
+                if rate:
+                    rates.append(rate)
+
+    if depth or rates:
+        return rates
+    raise ValueError("Agribank rate table not found")
+
+def _parse_row(cols):
+    if len(cols) < 4:
+        return None
+
+    currency = cols[0].strip()
+    if currency not in TARGET_CURRENCIES:
+        return None
+
+    try:
+        buy = float(cols[1].replace(',', '').strip())
+        sell = float(cols[3].replace(',', '').strip())
+        return CurrencyQuote.create('Agribank', currency, buy, sell)
+    except:
+        return None
+
+# Registered by scraper.registry.load_plugins
+SOURCE = Source('agribank', 'Agribank', 'currency', get_agribank_rates_async,
+                lambda content: parse_agribank_rates(content.decode('utf-8', 'replace')),
+                interval=120, ttl=300, instruments=TARGET_CURRENCIES)
@@ -1,246 +1,279 @@
-import requests
+import httpx
+import io
+import re
 import xml.etree.ElementTree as ET
 import logging
+from functools import lru_cache
+from quotes import GoldFeed, GoldQuote
+from scraper.http_client import fetch_parsed, run_sync
+from scraper.registry import Source
 
 logger = logging.getLogger(__name__)
 
-def get_doji_gold_rates():
-    """Scrape gold prices from DOJI API"""
-    url = "http://giavang.doji.vn/api/giavang/?api_key=258fbd2a72ce8481089d88c678e9fe4f"
-    
+DOJI_URL = "http://giavang.doji.vn/api/giavang/?api_key=258fbd2a72ce8481089d88c678e9fe4f"
+
+# Sections of the DOJI document, in the order their records are returned
+RATE_SECTIONS = ('DGPlist', 'IGPList', 'JewelryList')
+CHART_SECTIONS = ('IGPChart', 'GPChart')
+
+class DojiFeed(GoldFeed):
+    """One parsed download of the DOJI feed.
+
+    The same XML document carries domestic, international and jewelry prices
+    as well as the chart links, so it is fetched and parsed in a single
+    streaming pass and every view is derived from the result.
+    """
+
+    @classmethod
+    def from_bytes(cls, content):
+        sections = {}
+        for section, last_updated, rows in iter_doji_sections(content, RATE_SECTIONS + CHART_SECTIONS):
+            sections[section] = (last_updated, rows)
+        return cls(_rates_from_sections(sections), _charts_from_sections(sections))
+
+    @property
+    def domestic(self):
+        return [rate for rate in self.rates if rate.category == 'domestic']
+
+    @property
+    def international(self):
+        return [rate for rate in self.rates if rate.category == 'international']
+
+    @property
+    def jewelry(self):
+        return [rate for rate in self.rates if rate.category == 'gold_jewelry']
+
+async def fetch_doji_feed_async():
+    """Download and parse the DOJI feed; network and parse errors propagate
+    so the aggregator and circuit breaker see the real failure"""
+    feed = await fetch_parsed('doji', DOJI_URL, lambda res: DojiFeed.from_bytes(res.content))
+    logger.info(f"Successfully fetched {len(feed)} gold/jewelry prices from DOJI")
+    return feed
+
+async def _fetch_doji_feed_or_none():
+    """The DOJI feed, or None (logged) on failure, for the list helpers below"""
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        
-        # Parse XML response
-        root = ET.fromstring(response.content)
-        rates = []
-        
-        # Parse DGPlist (Domestic Gold Prices)
-        dgp_list = root.find('DGPlist')
-        if dgp_list is not None:
-            datetime_element = dgp_list.find('DateTime')
-            last_updated = datetime_element.text if datetime_element is not None else "Unknown"
-            
-            for row in dgp_list.findall('Row'):
-                name = row.get('Name', '')
-                key = row.get('Key', '')
-                sell_text = row.get('Sell', '0').replace(',', '').replace('-', '0')
-                buy_text = row.get('Buy', '0').replace(',', '').replace('-', '0')
-                
-                try:
-                    sell = float(sell_text) if sell_text and sell_text != '0' else 0
-                    buy = float(buy_text) if buy_text and buy_text != '0' else 0
-                    
-                    if sell > 0 or buy > 0:  # Only include if we have valid prices
-                        # Translate common Vietnamese gold terms to English
-                        english_name = translate_gold_name(name)
-                        
-                        rates.append({
-                            'type': 'gold',
-                            'category': 'domestic',
-                            'name': english_name,
-                            'original_name': name,  # Keep original for reference
-                            'key': key,
-                            'buy': buy,
-                            'sell': sell,
-                            'unit': 'VND/tael',  # Use 'tael' instead of 'chỉ'
-                            'last_updated': last_updated
-                        })
-                except (ValueError, TypeError):
-                    logger.warning(f"Could not parse gold price for {name}")
-                    continue
-        
-        # Parse IGPList (International Gold Prices)
-        igp_list = root.find('IGPList')
-        if igp_list is not None:
-            datetime_element = igp_list.find('DateTime')
-            last_updated = datetime_element.text if datetime_element is not None else "Unknown"
-            
-            for row in igp_list.findall('Row'):
-                name = row.get('Name', '')
-                key = row.get('Key', '')
-                sell_text = row.get('Sell', '0').replace(',', '').replace('-', '0')
-                buy_text = row.get('Buy', '0').replace(',', '').replace('-', '0')
-                
-                try:
-                    sell = float(sell_text) if sell_text and sell_text != '0' else 0
-                    buy = float(buy_text) if buy_text and buy_text != '0' else 0
-                    
-                    if sell > 0 or buy > 0:
-                        english_name = translate_gold_name(name)
-                        
-                        rates.append({
-                            'type': 'gold',
-                            'category': 'international',
-                            'name': english_name,
-                            'original_name': name,
-                            'key': key,
-                            'buy': buy,
-                            'sell': sell,
-                            'unit': 'USD/oz' if 'USD' in name else 'VND/tael',
-                            'last_updated': last_updated
-                        })
-                except (ValueError, TypeError):
-                    logger.warning(f"Could not parse international gold price for {name}")
-                    continue
-        
-        # Parse JewelryList (Jewelry Prices)
-        jewelry_list = root.find('JewelryList')
-        if jewelry_list is not None:
-            datetime_element = jewelry_list.find('DateTime')
-            last_updated = datetime_element.text if datetime_element is not None else "Unknown"
-            
-            for row in jewelry_list.findall('Row'):
-                name = row.get('Name', '')
-                key = row.get('Key', '')
-                sell_text = row.get('Sell', '0').replace(',', '').replace('-', '0')
-                buy_text = row.get('Buy', '0').replace(',', '').replace('-', '0')
-                
-                try:
-                    sell = float(sell_text) if sell_text and sell_text != '0' else 0
-                    buy = float(buy_text) if buy_text and buy_text != '0' else 0
-                    
-                    if sell > 0 or buy > 0:
-                        english_name = translate_gold_name(name)
-                        
-                        # Determine unit based on price range
-                        unit = 'VND/tael' if sell > 1000 else 'VND/gram'
-                        if 'thousand' in english_name.lower():
-                            unit = 'VND x1000/tael'
-                        
-                        rates.append({
-                            'type': 'jewelry',
-                            'category': 'gold_jewelry',
-                            'name': english_name,
-                            'original_name': name,
-                            'key': key,
-                            'buy': buy,
-                            'sell': sell,
-                            'unit': unit,
-                            'last_updated': last_updated
-                        })
-                except (ValueError, TypeError):
-                    logger.warning(f"Could not parse jewelry price for {name}")
-                    continue
-        
-        logger.info(f"Successfully fetched {len(rates)} gold/jewelry prices from DOJI")
-        return rates
-        
-    except requests.RequestException as e:
+        return await fetch_doji_feed_async()
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching DOJI gold rates: {e}")
-        return []
+        return None
     except ET.ParseError as e:
         logger.error(f"Error parsing DOJI XML response: {e}")
-        return []
+        return None
     except Exception as e:
         logger.error(f"Unexpected error in DOJI scraper: {e}")
-        return []
+        return None
+
+def fetch_doji_feed():
+    return run_sync(fetch_doji_feed_async())
+
+async def get_doji_gold_rates_async(feed=None):
+    """Scrape gold prices from DOJI API"""
+    if feed is None:
+        feed = await _fetch_doji_feed_or_none()
+    return feed.rates if feed is not None else []
+
+async def get_gold_charts_async(feed=None):
+    """Get gold chart URLs from DOJI API"""
+    if feed is None:
+        feed = await _fetch_doji_feed_or_none()
+    return feed.charts if feed is not None else []
+
+def get_doji_gold_rates(feed=None):
+    """Scrape gold prices from DOJI API"""
+    return run_sync(get_doji_gold_rates_async(feed))
+
+def get_gold_charts(feed=None):
+    """Get gold chart URLs from DOJI API"""
+    return run_sync(get_gold_charts_async(feed))
+
+def iter_doji_sections(content, sections):
+    """Stream a DOJI document, yielding (section, last_updated, rows) as each
+    wanted section closes.
+
+    Rows are the raw attribute dicts of the section's <Row> elements. Parsed
+    elements are cleared as soon as they are read, and parsing stops once
+    every wanted section has been seen.
+    """
+    wanted = set(sections)
+    current = None
+    rows = []
+    last_updated = None
+
+    for event, element in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+        if event == 'start':
+            if element.tag in wanted:
+                current, rows, last_updated = element.tag, [], None
+            continue
+
+        if current is None:
+            continue
+
+        if element.tag == 'Row':
+            rows.append(dict(element.attrib))
+            element.clear()
+        elif element.tag == 'DateTime':
+            last_updated = element.text
+        elif element.tag == current:
+            yield current, last_updated or "Unknown", rows
+            element.clear()
+            wanted.discard(current)
+            current = None
+            if not wanted:
+                return
+
+def parse_gold_rates(content):
+    """Extract domestic, international and jewelry prices from a DOJI document"""
+    sections = {section: (last_updated, rows) for section, last_updated, rows in iter_doji_sections(content, RATE_SECTIONS)}
+    return _rates_from_sections(sections)
 
+def parse_gold_charts(content):
+    """Extract chart links from a DOJI document"""
+    sections = {section: (last_updated, rows) for section, last_updated, rows in iter_doji_sections(content, CHART_SECTIONS)}
+    return _charts_from_sections(sections)
+
+def _parse_price(text):
+    text = text.replace(',', '').replace('-', '0')
+    return float(text) if text and text != '0' else 0
+
+def _rates_from_sections(sections):
+    rates = []
+    for section in RATE_SECTIONS:
+        if section not in sections:
+            continue
+        last_updated, rows = sections[section]
+
+        for row in rows:
+            name = row.get('Name', '')
+            try:
+                sell = _parse_price(row.get('Sell', '0'))
+                buy = _parse_price(row.get('Buy', '0'))
+            except (ValueError, TypeError):
+                logger.warning(f"Could not parse {section} gold price for {name}")
+                continue
+
+            if sell > 0 or buy > 0:  # Only include if we have valid prices
+                rates.append(_build_rate(section, row, name, buy, sell, last_updated))
+
+    return rates
+
+def _build_rate(section, row, name, buy, sell, last_updated):
+    # Translate common Vietnamese gold terms to English
+    english_name = translate_gold_name(name)
+
+    if section == 'DGPlist':
+        kind, category = 'gold', 'domestic'
+        unit = 'VND/tael'  # Use 'tael' instead of 'chỉ'
+    elif section == 'IGPList':
+        kind, category = 'gold', 'international'
+        unit = 'USD/oz' if 'USD' in name else 'VND/tael'
+    else:
+        kind, category = 'jewelry', 'gold_jewelry'
+        # Determine unit based on price range
+        unit = 'VND/tael' if sell > 1000 else 'VND/gram'
+        if 'thousand' in english_name.lower():
+            unit = 'VND x1000/tael'
+
+    return GoldQuote.create(
+        type=kind,
+        category=category,
+        name=english_name,
+        original_name=name,  # Keep original for reference
+        key=row.get('Key', ''),
+        buy=buy,
+        sell=sell,
+        unit=unit,
+        last_updated=last_updated
+    )
+
+def _charts_from_sections(sections):
+    charts = []
+    for section, chart_type in (('IGPChart', 'international_chart'), ('GPChart', 'domestic_chart')):
+        if section not in sections:
+            continue
+        for row in sections[section][1]:
+            charts.append({
+                'type': chart_type,
+                'name': translate_gold_name(row.get('Name', '')),
+                'original_name': row.get('Name', ''),
+                'key': row.get('Key', ''),
+                'url': row.get('Url', '')
+            })
+
+    return charts
+
+# Vietnamese terms and their English translation
+GOLD_TRANSLATIONS = {
+    # Common gold types
+    'Vàng SJC': 'SJC Gold',
+    'Vàng DOJI': 'DOJI Gold',
+    'Vàng PNJ': 'PNJ Gold',
+    'Vàng Bảo Tín': 'Bao Tin Gold',
+    'Vàng 24k': '24k Gold',
+    'Vàng 18k': '18k Gold',
+    'Vàng 14k': '14k Gold',
+    'Vàng 10k': '10k Gold',
+    'Vàng 9999': '9999 Gold',
+    'Vàng trang sức': 'Jewelry Gold',
+    'Vàng nhẫn': 'Ring Gold',
+    'Vàng dây chuyền': 'Necklace Gold',
+    'Vàng lắc': 'Bracelet Gold',
+    'Vàng bông tai': 'Earring Gold',
+
+    # Units and descriptors
+    'chỉ': 'tael',
+    'gram': 'gram',
+    'nghìn': 'thousand',
+    'triệu': 'million',
+    'tỷ': 'billion',
+    'mua': 'buy',
+    'bán': 'sell',
+    'giá': 'price',
+    'hôm nay': 'today',
+    'cập nhật': 'updated',
+
+    # International terms
+    'USD': 'USD',
+    'Ounce': 'Ounce',
+    'Troy Ounce': 'Troy Ounce',
+    'Spot': 'Spot',
+    'Future': 'Future',
+    'London': 'London',
+    'New York': 'New York',
+    'Comex': 'Comex',
+    'Loco London': 'Loco London',
+
+    # Common patterns
+    'Vàng miếng': 'Gold Bar',
+    'Vàng lá': 'Gold Leaf',
+    'Vàng nữ trang': 'Women\'s Jewelry',
+    'Vàng nam': 'Men\'s Gold',
+    'Vàng trẻ em': 'Children\'s Gold',
+    'Kim cương': 'Diamond',
+    'Bạc': 'Silver',
+    'Bạch kim': 'Platinum'
+}
+
+# One alternation over every term that changes, longest first, so a longer
+# phrase such as 'Bạch kim' always wins over its prefix 'Bạc'
+_TRANSLATION_PATTERN = re.compile('|'.join(
+    re.escape(term)
+    for term in sorted(GOLD_TRANSLATIONS, key=len, reverse=True)
+    if GOLD_TRANSLATIONS[term] != term
+))
+
+def _translate_match(match):
+    return GOLD_TRANSLATIONS[match.group(0)]
+
+@lru_cache(maxsize=1024)
 def translate_gold_name(vietnamese_name):
-    """Translate Vietnamese gold names to English"""
-    translations = {
-        # Common gold types
-        'Vàng SJC': 'SJC Gold',
-        'Vàng DOJI': 'DOJI Gold',
-        'Vàng PNJ': 'PNJ Gold',
-        'Vàng Bảo Tín': 'Bao Tin Gold',
-        'Vàng 24k': '24k Gold',
-        'Vàng 18k': '18k Gold',
-        'Vàng 14k': '14k Gold',
-        'Vàng 10k': '10k Gold',
-        'Vàng 9999': '9999 Gold',
-        'Vàng trang sức': 'Jewelry Gold',
-        'Vàng nhẫn': 'Ring Gold',
-        'Vàng dây chuyền': 'Necklace Gold',
-        'Vàng lắc': 'Bracelet Gold',
-        'Vàng bông tai': 'Earring Gold',
-        
-        # Units and descriptors
-        'chỉ': 'tael',
-        'gram': 'gram',
-        'nghìn': 'thousand',
-        'triệu': 'million',
-        'tỷ': 'billion',
-        'mua': 'buy',
-        'bán': 'sell',
-        'giá': 'price',
-        'hôm nay': 'today',
-        'cập nhật': 'updated',
-        
-        # International terms
-        'USD': 'USD',
-        'Ounce': 'Ounce',
-        'Troy Ounce': 'Troy Ounce',
-        'Spot': 'Spot',
-        'Future': 'Future',
-        'London': 'London',
-        'New York': 'New York',
-        'Comex': 'Comex',
-        'Loco London': 'Loco London',
-        
-        # Common patterns
-        'Vàng miếng': 'Gold Bar',
-        'Vàng lá': 'Gold Leaf',
-        'Vàng nữ trang': 'Women\'s Jewelry',
-        'Vàng nam': 'Men\'s Gold',
-        'Vàng trẻ em': 'Children\'s Gold',
-        'Kim cương': 'Diamond',
-        'Bạc': 'Silver',
-        'Bạch kim': 'Platinum'
-    }
-    
-    # Start with the original name
-    result = vietnamese_name
-    
-    # Apply translations
-    for vn_term, en_term in translations.items():
-        result = result.replace(vn_term, en_term)
+    """Translate Vietnamese gold names to English in a single pass"""
+    result = _TRANSLATION_PATTERN.sub(_translate_match, vietnamese_name)
     
     # Clean up extra spaces and formatting
-    result = ' '.join(result.split())
-    
-    return result
+    return ' '.join(result.split())
 
-def get_gold_charts():
-    """Get gold chart URLs from DOJI API"""
-    url = "http://giavang.doji.vn/api/giavang/?api_key=258fbd2a72ce8481089d88c678e9fe4f"
-    
-    try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.content)
-        charts = []
-        
-        # Get International Gold Chart
-        igp_chart = root.find('IGPChart')
-        if igp_chart is not None:
-            for row in igp_chart.findall('Row'):
-                name = translate_gold_name(row.get('Name', ''))
-                charts.append({
-                    'type': 'international_chart',
-                    'name': name,
-                    'original_name': row.get('Name', ''),
-                    'key': row.get('Key', ''),
-                    'url': row.get('Url', '')
-                })
-        
-        # Get Domestic Gold Chart
-        gp_chart = root.find('GPChart')
-        if gp_chart is not None:
-            for row in gp_chart.findall('Row'):
-                name = translate_gold_name(row.get('Name', ''))
-                charts.append({
-                    'type': 'domestic_chart',
-                    'name': name,
-                    'original_name': row.get('Name', ''),
-                    'key': row.get('Key', ''),
-                    'url': row.get('Url', '')
-                })
-        
-        return charts
-        
-    except Exception as e:
-        logger.error(f"Error fetching gold charts: {e}")
-        return []
+
+# Registered by scraper.registry.load_plugins
+SOURCE = Source('doji', 'DOJI', 'gold', fetch_doji_feed_async, DojiFeed.from_bytes,
+                interval=60, ttl=120, instruments=('domestic', 'international', 'gold_jewelry'))
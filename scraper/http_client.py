@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+
+from metrics import FETCH_BYTES, FETCH_SECONDS, PARSE_SECONDS, SOURCE_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait on each upstream host before giving up
+HOST_TIMEOUTS = {
+    'portal.vietcombank.com.vn': 10.0,
+    'www.agribank.com.vn': 15.0,
+    'giavang.doji.vn': 15.0,
+}
+DEFAULT_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 5.0
+
+# Keep a few connections per host alive between refreshes
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120)
+
+HEADERS = {'User-Agent': 'fx-rate-api/1.0'}
+
+_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+_loop = None
+_loop_lock = threading.Lock()
+
+# Last validators, body hash and parsed result per source
+_validators = {}
+_validators_lock = threading.Lock()
+conditional_stats = {'not_modified': 0, 'unchanged': 0, 'parsed': 0}
+
+
+class _Validators:
+    __slots__ = ('etag', 'last_modified', 'digest', 'parsed')
+
+    def __init__(self, etag, last_modified, digest, parsed):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.parsed = parsed
+
+
+def http2_enabled():
+    """HTTP/2 is opt-in via HTTP2_ENABLED=1 and needs the optional h2 package"""
+    if os.environ.get('HTTP2_ENABLED', '0') != '1':
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+
+
+def timeout_for(url):
+    host = urlsplit(url).hostname or ''
+    return httpx.Timeout(HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT), connect=CONNECT_TIMEOUT)
+
+
+def get_async_client():
+    """Return the pooled AsyncClient for the running event loop.
+
+    httpx clients are tied to the loop they were first used on, so each loop
+    gets its own client; in practice that is the shared background loop plus
+    the loop of an async web server.
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=LIMITS,
+                headers=HEADERS,
+                http2=http2_enabled(),
+                follow_redirects=True,
+            )
+            _clients[loop] = client
+        return client
+
+
+async def fetch(url, headers=None):
+    """GET ``url`` through the pooled client, raising on HTTP errors"""
+    client = get_async_client()
+    response = await client.get(url, headers=headers, timeout=timeout_for(url))
+    response.raise_for_status()
+    return response
+
+
+async def fetch_parsed(name, url, parse):
+    """GET ``url`` and return ``parse(response)``, skipping work when unchanged.
+
+    The ETag / Last-Modified validators from the previous response for
+    ``name`` are sent as a conditional request. A 304, or a 200 whose body
+    hashes the same as last time, returns the previously parsed result
+    without parsing again.
+    """
+    with _validators_lock:
+        previous = _validators.get(name)
+
+    headers = {}
+    if previous is not None:
+        if previous.etag:
+            headers['If-None-Match'] = previous.etag
+        if previous.last_modified:
+            headers['If-Modified-Since'] = previous.last_modified
+
+    client = get_async_client()
+    start = time.perf_counter()
+    try:
+        response = await client.get(url, headers=headers, timeout=timeout_for(url))
+    except Exception:
+        FETCH_SECONDS.observe(time.perf_counter() - start, source=name, status='error')
+        raise
+    FETCH_SECONDS.observe(time.perf_counter() - start, source=name, status=response.status_code)
+    FETCH_BYTES.inc(len(response.content), source=name)
+
+    if response.status_code == 304 and previous is not None:
+        conditional_stats['not_modified'] += 1
+        return previous.parsed
+
+    response.raise_for_status()
+    digest = hashlib.blake2b(response.content, digest_size=16).digest()
+
+    if previous is not None and previous.digest == digest:
+        conditional_stats['unchanged'] += 1
+        parsed = previous.parsed
+    else:
+        conditional_stats['parsed'] += 1
+        with PARSE_SECONDS.time(source=name):
+            parsed = parse(response)
+        if hasattr(parsed, '__len__'):
+            SOURCE_ROWS.set(len(parsed), source=name)
+
+    with _validators_lock:
+        _validators[name] = _Validators(
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            digest,
+            parsed,
+        )
+    return parsed
+
+
+def reset_validators(name=None):
+    """Forget stored validators so the next fetch downloads and parses in full"""
+    with _validators_lock:
+        if name is None:
+            _validators.clear()
+        else:
+            _validators.pop(name, None)
+
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='http-client-loop', daemon=True).start()
+        return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Run ``coro`` on the shared background loop and wait for its result.
+
+    This is the sync façade used by app.py and main.py: every call reuses
+    the same loop, and therefore the same pooled keep-alive connections.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _background_loop())
+    return future.result(timeout)
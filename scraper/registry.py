@@ -0,0 +1,91 @@
+"""Registry of upstream sources.
+
+Each scraper module describes its feed with a module-level ``SOURCE``.
+The web apps, scheduler and CLI iterate over the registry instead of
+naming banks, so adding a source means writing one such module and
+listing it in ``BUILTIN_PLUGINS`` (or, outside this repository, in the
+comma-separated ``SOURCE_PLUGINS`` environment variable).
+"""
+import importlib
+import os
+from collections import namedtuple
+
+from scraper.http_client import run_sync
+
+# Currencies the bank scrapers extract from their rate tables
+TARGET_CURRENCIES = ('USD', 'EUR', 'JPY', 'CNY')
+
+# Modules defining the built-in sources, in display order
+BUILTIN_PLUGINS = ('scraper.vcb', 'scraper.agribank', 'scraper.doji_gold')
+
+
+class Source(namedtuple('Source', ['name', 'label', 'kind', 'fetch', 'parse', 'interval', 'ttl',
+                                   'instruments'])):
+    """One upstream feed.
+
+    ``kind`` is 'currency' for banks, whose data is a list of rate rows, or
+    'gold' for feeds whose data has ``rates`` and ``charts`` (a GoldFeed).
+    ``fetch`` is a zero-argument coroutine function returning that data and
+    ``parse`` builds it from a raw payload. ``interval`` is the seconds
+    between scheduled polls, ``ttl`` how long a cached result stays fresh,
+    and ``instruments`` the currencies or gold categories it quotes.
+    """
+    __slots__ = ()
+
+    def fetch_sync(self):
+        return run_sync(self.fetch())
+
+
+_sources = {}
+_loaded = False
+
+
+def register(source):
+    """Add or replace a source; later registrations come after earlier ones"""
+    _sources[source.name] = source
+    return source
+
+
+def load_plugins():
+    """Register the ``SOURCE`` of every built-in module and of those named in
+    SOURCE_PLUGINS, in that order. Runs once per process."""
+    global _loaded
+    if _loaded:
+        return
+    extra = [name.strip() for name in os.environ.get('SOURCE_PLUGINS', '').split(',') if name.strip()]
+    for module in BUILTIN_PLUGINS + tuple(extra):
+        register(importlib.import_module(module).SOURCE)
+    # Only once every plugin imported, so a failed import is retried in full
+    _loaded = True
+
+
+def sources():
+    """All registered sources by name, in registration order"""
+    load_plugins()
+    return dict(_sources)
+
+
+def names(kind=None):
+    return [name for name, source in sources().items() if kind is None or source.kind == kind]
+
+
+def instruments(kind=None):
+    """Union of the instruments quoted by the sources of ``kind``, in
+    registration order, e.g. every currency some bank quotes"""
+    seen = {}
+    for source in sources().values():
+        if kind is None or source.kind == kind:
+            seen.update(dict.fromkeys(source.instruments))
+    return list(seen)
+
+
+def sync_fetchers(selected=None):
+    """name -> blocking fetch function, for fetch_all and the scheduler"""
+    return {name: source.fetch_sync for name, source in sources().items()
+            if selected is None or name in selected}
+
+
+def async_fetchers(selected=None):
+    """name -> coroutine function, for fetch_all_async"""
+    return {name: source.fetch for name, source in sources().items()
+            if selected is None or name in selected}
@@ -1,25 +1,47 @@
-import requests
+import io
 import xml.etree.ElementTree as ET
+from quotes import CurrencyQuote
+from scraper.http_client import fetch_parsed, run_sync
+from scraper.registry import TARGET_CURRENCIES, Source
+
+VCB_URL = "https://portal.vietcombank.com.vn/Usercontrols/TVPortal.TyGia/pXML.aspx"
+
+async def get_vcb_rates_async():
+    return await fetch_parsed('vcb', VCB_URL, lambda res: parse_vcb_rates(res.content))
 
 def get_vcb_rates():
-    url = "https://portal.vietcombank.com.vn/Usercontrols/TVPortal.TyGia/pXML.aspx"
-    res = requests.get(url)
-    root = ET.fromstring(res.content)
-    target_currencies = ['USD', 'EUR', 'JPY', 'CNY']
-    rates = []
+    return run_sync(get_vcb_rates_async())
+
+def parse_vcb_rates(content):
+    return list(iter_vcb_rates(content))
+
+def iter_vcb_rates(content):
+    """Yield target currency rates as each <Exrate> element closes.
+
+    Elements are cleared once read and parsing stops after the last target
+    currency, so the rest of the feed is never built into a tree.
+    """
+    wanted = set(TARGET_CURRENCIES)
+
+    for _, item in ET.iterparse(io.BytesIO(content)):
+        if item.tag != 'Exrate':
+            continue
 
-    for item in root.findall('Exrate'):
         currency = item.get('CurrencyCode')
-        if currency in target_currencies:
+        if currency in wanted:
             try:
                 buy = float(item.get('Transfer').replace(',', ''))
                 sell = float(item.get('Sell').replace(',', ''))
-                rates.append({
-                    'bank': 'VCB',
-                    'currency': currency,
-                    'buy': buy,
-                    'sell': sell
-                })
             except:
-                continue
-    return rates
+                buy = sell = None
+            if buy is not None:
+                yield CurrencyQuote.create('VCB', currency, buy, sell)
+                wanted.discard(currency)
+        item.clear()
+
+        if not wanted:
+            return
+
+# Registered by scraper.registry.load_plugins
+SOURCE = Source('vcb', 'VCB', 'currency', get_vcb_rates_async, parse_vcb_rates,
+                interval=120, ttl=300, instruments=TARGET_CURRENCIES)
@@ -0,0 +1,128 @@
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from quotes import CurrencyQuote, GoldFeed, as_dicts
+from responses import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+def encode_value(value):
+    """JSON-ready form of one source's data: quote rows, or a feed's rates and charts"""
+    if isinstance(value, GoldFeed):
+        return value.as_dict()
+    return as_dicts(value)
+
+
+def decode_value(value):
+    """Inverse of ``encode_value``; gold data comes back as a plain GoldFeed"""
+    if isinstance(value, dict):
+        return GoldFeed.from_dict(value)
+    return tuple(CurrencyQuote.create(**row) for row in value)
+
+
+class SharedSnapshot:
+    """Snapshot file shared by every worker process on the host.
+
+    The worker that scrapes writes each published snapshot atomically
+    (temp file + rename); the other workers notice the new file with a
+    cheap stat, at most every ``check_interval`` seconds, and load it.
+    The file is plain JSON, never pickle, and ``path`` should be in a
+    directory only this service can write to (gunicorn.conf.py creates a
+    private one).
+    """
+
+    def __init__(self, path, check_interval=0.5):
+        self.path = path
+        self.check_interval = check_interval
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def write(self, version, created_at, data, fetched_at, health, polled_at=None):
+        payload = dumps({
+            'version': version,
+            'created_at': created_at,
+            'data': {name: encode_value(value) for name, value in data.items()},
+            'fetched_at': dict(fetched_at),
+            'health': dict(health),
+            'polled_at': dict(polled_at or {}),
+        })
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def read_if_changed(self, force=False):
+        """The snapshot dict if the file changed since the last read, else None"""
+        now = time.monotonic()
+        if now < self._next_check and not force:
+            return None
+
+        with self._lock:
+            self._next_check = now + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return None
+
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if signature == self._signature:
+                return None
+
+            try:
+                with open(self.path, 'rb') as f:
+                    payload = loads(f.read())
+                payload['data'] = {name: decode_value(value) for name, value in payload['data'].items()}
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Could not read shared snapshot {self.path}: {str(e)}")
+                return None
+
+            self._signature = signature
+            return payload
+
+
+class LeaderLock:
+    """Non-blocking exclusive file lock; held by the one worker that scrapes.
+
+    The OS releases the lock when the holder exits, so another worker can
+    take over on its next ``try_acquire``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        if self._file is not None:
+            return True
+
+        f = open(self.path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
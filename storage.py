@@ -0,0 +1,150 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Next to the code rather than in whatever directory the server starts in
+DEFAULT_PATH = os.environ.get('HISTORY_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quotes.db'))
+
+# category is '' for bank rates; the same DOJI key can appear in several
+# categories, so it is part of every quote's identity
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    source TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    instrument TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    buy REAL,
+    sell REAL,
+    last_updated TEXT,
+    PRIMARY KEY (source, category, instrument, fetched_at)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = 'source, category, instrument, fetched_at, buy, sell, last_updated'
+
+# Files written before category was part of the key
+MIGRATE_V1 = f"""
+ALTER TABLE quotes RENAME TO quotes_v1;
+{SCHEMA}
+INSERT OR IGNORE INTO quotes ({COLUMNS})
+    SELECT source, COALESCE(category, ''), instrument, fetched_at, buy, sell, last_updated FROM quotes_v1;
+DROP TABLE quotes_v1;
+"""
+
+
+class QuoteStore:
+    """Append-only SQLite history of every scraped quote.
+
+    Rows are clustered by (source, category, instrument, fetched_at), so a
+    range query for one instrument reads a contiguous slice of the table
+    however much history there is. A quote is only written when its
+    buy/sell differs from the last one stored for the same instrument,
+    including one stored by another worker process.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+        self._last = self._load_last_values()
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self):
+        # Moves only when another connection (another worker) commits
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _migrate(self):
+        primary_key = [name for _, name, _, _, _, pk in self._conn.execute('PRAGMA table_info(quotes)') if pk]
+        if primary_key and 'category' not in primary_key:
+            logger.info(f"Adding category to the quote history key in {self.path}")
+            self._conn.executescript(f"BEGIN; {MIGRATE_V1} COMMIT;")
+
+    def _load_last_values(self):
+        rows = self._conn.execute("""
+            SELECT q.source, q.category, q.instrument, q.buy, q.sell
+            FROM quotes q
+            JOIN (SELECT source, category, instrument, MAX(fetched_at) AS fetched_at
+                  FROM quotes GROUP BY source, category, instrument) latest
+            USING (source, category, instrument, fetched_at)
+        """)
+        return {(source, category, instrument): (buy, sell) for source, category, instrument, buy, sell in rows}
+
+    def record(self, source, rows, fetched_at=None):
+        """Store the quotes in ``rows`` that changed; returns how many were written"""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        changed = []
+
+        with self._lock:
+            data_version = self._read_data_version()
+            if data_version != self._data_version:
+                # Another worker stored quotes since we last looked (it was
+                # the leader before us), so our last values are out of date
+                self._last = self._load_last_values()
+                self._data_version = data_version
+
+            for row in rows:
+                key = (source, row.category or '', row.instrument)
+                values = (row.buy, row.sell)
+                if self._last.get(key) == values:
+                    continue
+                self._last[key] = values
+                changed.append((*key, fetched_at, row.buy, row.sell, row.last_updated))
+
+            if changed:
+                with self._conn:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO quotes ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", changed
+                    )
+
+        if changed:
+            logger.info(f"Stored {len(changed)} changed quotes for {source}")
+        return len(changed)
+
+    def history(self, source, instrument, start=None, end=None, category=''):
+        """(fetched_at, buy, sell) tuples for one instrument, oldest first.
+
+        ``category`` is '' for bank rates and the gold category otherwise.
+        """
+        query = "SELECT fetched_at, buy, sell FROM quotes WHERE source = ? AND category = ? AND instrument = ?"
+        params = [source, category, instrument]
+        if start is not None:
+            query += " AND fetched_at >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND fetched_at < ?"
+            params.append(end)
+        query += " ORDER BY fetched_at"
+
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def last_before(self, source, instrument, when, category=''):
+        """The last (fetched_at, buy, sell) stored before ``when``, or None"""
+        with self._lock:
+            return self._conn.execute("""
+                SELECT fetched_at, buy, sell FROM quotes
+                WHERE source = ? AND category = ? AND instrument = ? AND fetched_at < ?
+                ORDER BY fetched_at DESC LIMIT 1
+            """, (source, category, instrument, when)).fetchone()
+
+    def instruments(self, source, category=None):
+        query = "SELECT DISTINCT instrument FROM quotes WHERE source = ?"
+        params = [source]
+        if category is not None:
+            query += " AND category = ?"
+            params.append(category)
+
+        with self._lock:
+            return [instrument for (instrument,) in self._conn.execute(query, params)]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+
+from diff import diff_data
+from quotes import CurrencyQuote, GoldQuote, as_dicts
+from responses import dumps
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for a new snapshot, and between keep-alive comments
+POLL_INTERVAL = float(os.environ.get('STREAM_POLL_INTERVAL', 1.0))
+HEARTBEAT_INTERVAL = float(os.environ.get('STREAM_HEARTBEAT', 15.0))
+
+# Events a slow client may fall behind by before it is disconnected
+MAX_PENDING = 100
+
+
+def topic_of(rate):
+    """'currency:USD' for bank rates, 'gold:domestic' etc. for DOJI rates.
+
+    Works on quote rows, their dict form and change event dicts alike.
+    """
+    if isinstance(rate, CurrencyQuote):
+        return f"currency:{rate.currency}"
+    if isinstance(rate, GoldQuote):
+        return f"gold:{rate.category}"
+    if 'currency' in rate:
+        return f"currency:{rate['currency']}"
+    return f"gold:{rate['category']}"
+
+
+def parse_topics(currency=None, gold=None):
+    """Topic set from ``?currency=USD,EUR&gold=domestic`` style filters.
+
+    'all' (or an empty value) subscribes to a whole group; no filters at all
+    means every topic, which is returned as None.
+    """
+    if currency is None and gold is None:
+        return None
+
+    topics = set()
+    for group, values in (('currency', currency), ('gold', gold)):
+        if values is None:
+            continue
+        for value in values.split(','):
+            value = value.strip()
+            if not value or value.lower() == 'all':
+                topics.add(group)
+            elif group == 'currency':
+                topics.add(f"currency:{value.upper()}")
+            else:
+                topics.add(f"gold:{'gold_jewelry' if value == 'jewelry' else value}")
+    return topics
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {dumps(data).decode('utf-8')}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class Subscription:
+    """One streaming client: its topic filter and pending change events"""
+
+    def __init__(self, topics):
+        self.topics = topics
+        self.queue = asyncio.Queue(MAX_PENDING)
+        self.closed = False
+
+    def wants(self, item):
+        if self.topics is None:
+            return True
+        topic = topic_of(item)
+        return topic in self.topics or topic.split(':', 1)[0] in self.topics
+
+    def filter(self, items):
+        return [item for item in items if self.wants(item)]
+
+
+class ChangeStream:
+    """Pushes change events to every subscribed streaming client.
+
+    A single watcher task per process checks ``load_view()`` every
+    ``poll_interval`` seconds. When the snapshot version moves on it diffs
+    the two views (see diff.py) and queues the change events for each
+    subscriber whose topics match. Reading the view rather than listening
+    to the scheduler means follower workers, which never run the
+    scheduler's listeners, stream the same changes as the leader.
+    """
+
+    def __init__(self, load_view, poll_interval=POLL_INTERVAL):
+        self.load_view = load_view
+        self.poll_interval = poll_interval
+        self._subscribers = set()
+        self._view = None
+        self._task = None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, topics=None):
+        """Register a client; returns (subscription, current view).
+
+        The latest view is loaded in the same step that registers the
+        subscription, and the watcher first catches up to it (pushing the
+        changes to the existing clients), so the new client's snapshot is
+        exactly the view its first change event is diffed from.
+        """
+        view = self.load_view()
+        if self._task is None or self._task.done():
+            self._view = view
+            self._task = asyncio.ensure_future(self._watch())
+        else:
+            self._advance(view)
+        subscription = Subscription(topics)
+        self._subscribers.add(subscription)
+        return subscription, self._view
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        self._subscribers.discard(subscription)
+
+    def publish(self, view, events):
+        for subscription in list(self._subscribers):
+            matching = subscription.filter(events)
+            if not matching:
+                continue
+            try:
+                subscription.queue.put_nowait((view.version, matching))
+            except asyncio.QueueFull:
+                logger.warning("Dropping a stream client that stopped reading")
+                self.unsubscribe(subscription)
+
+    def _advance(self, view):
+        """Move the watcher to ``view``, publishing what changed since the last one"""
+        if view.version == self._view.version:
+            return
+        changes = diff_data(self._view.data, view.data)
+        self._view = view
+        if changes:
+            self.publish(view, [change.as_dict() for change in changes])
+
+    async def _watch(self):
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                self._advance(self.load_view())
+            except Exception as e:
+                logger.error(f"Error watching for rate changes: {str(e)}")
+
+    async def events(self, subscription, view, heartbeat=HEARTBEAT_INTERVAL):
+        """SSE messages for one client: a snapshot, then changes and heartbeats.
+
+        Past events are not kept, so ``Last-Event-ID`` is ignored: a client
+        that reconnects always starts again from a fresh snapshot.
+        """
+        try:
+            yield format_sse('snapshot', {
+                'version': view.version,
+                'data': as_dicts(subscription.filter(view.currency_rates + view.gold_rates)),
+            }, view.version)
+
+            while not subscription.closed:
+                try:
+                    version, events = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield b': heartbeat\n\n'
+                    continue
+                yield format_sse('change', {'version': version, 'data': events}, version)
+        finally:
+            self.unsubscribe(subscription)
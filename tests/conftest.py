@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Import the apps without background polling and with a scratch history file
+os.environ['SCHEDULER_ENABLED'] = '0'
+os.environ.setdefault('HISTORY_DB', os.path.join(tempfile.mkdtemp(), 'test.db'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
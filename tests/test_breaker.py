@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+import breaker
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    """Stands in for the time module inside breaker.py"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(breaker, 'time', clock)
+    return clock
+
+
+def failing():
+    raise ConnectionError('upstream down')
+
+
+def fail(circuit, times=1):
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            circuit.call(failing)
+
+
+def test_threshold_opens_the_circuit(clock):
+    circuit = CircuitBreaker('vcb', threshold=3, base_backoff=30)
+    fail(circuit, 2)
+    assert circuit.state == CLOSED
+
+    fail(circuit)
+    assert circuit.state == OPEN
+    assert circuit.retry_in == 30
+    assert circuit.last_error == 'upstream down'
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        circuit.call(lambda: calls.append(1))
+    assert calls == []
+
+
+def test_empty_result_counts_as_failure(clock):
+    circuit = CircuitBreaker('vcb', threshold=1)
+    assert circuit.call(list) == []
+    assert circuit.state == OPEN
+    assert circuit.last_error == 'no data returned'
+
+
+def test_success_resets_the_failure_count(clock):
+    circuit = CircuitBreaker('vcb', threshold=3)
+    fail(circuit, 2)
+    assert circuit.call(lambda: [1]) == [1]
+    fail(circuit, 2)
+    assert circuit.state == CLOSED and circuit.failures == 2
+
+
+def test_failed_probe_doubles_the_backoff_up_to_the_maximum(clock):
+    circuit = CircuitBreaker('vcb', threshold=1, base_backoff=30, max_backoff=100)
+    fail(circuit)
+    assert circuit.retry_in == 30
+
+    clock.advance(30)
+    fail(circuit)
+    assert circuit.state == OPEN and circuit.retry_in == 60
+
+    clock.advance(60)
+    fail(circuit)
+    assert circuit.retry_in == 100
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    circuit = CircuitBreaker('vcb', threshold=1, base_backoff=30)
+    fail(circuit)
+    clock.advance(29)
+    assert not circuit.allow()
+
+    clock.advance(1)
+    assert circuit.call(lambda: [1]) == [1]
+    assert circuit.state == CLOSED and circuit.failures == 0
+
+    # The next outage starts again from the base backoff
+    fail(circuit)
+    assert circuit.retry_in == 30
+
+
+def test_half_open_lets_one_probe_through_at_a_time(clock):
+    circuit = CircuitBreaker('vcb', threshold=1, base_backoff=30)
+    fail(circuit)
+    clock.advance(30)
+
+    started, release = threading.Event(), threading.Event()
+
+    def probe():
+        started.set()
+        release.wait(5)
+        return [1]
+
+    thread = threading.Thread(target=circuit.call, args=(probe,))
+    thread.start()
+    assert started.wait(5)
+    assert circuit.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        circuit.call(lambda: [2])
+
+    release.set()
+    thread.join(5)
+    assert circuit.state == CLOSED
+
+
+def test_health_reports_when_an_open_circuit_retries(clock):
+    circuit = CircuitBreaker('vcb', threshold=1, base_backoff=30)
+    assert circuit.health() == {'circuit': CLOSED, 'failures': 0, 'last_error': None, 'retry_at': None}
+    fail(circuit)
+    assert circuit.health()['retry_at'] == clock.now + 30
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+import cache
+from cache import TTLCache
+
+
+class FakeClock:
+    """Stands in for the time module inside cache.py"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class StubFetch:
+    """Returns the queued values in order and counts the calls"""
+
+    def __init__(self, *values, gate=None):
+        self.values = list(values)
+        self.calls = 0
+        self.gate = gate
+
+    def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        return self.values.pop(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, 'time', clock)
+    return clock
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def test_fresh_entry_is_a_hit(clock):
+    rates = TTLCache({'vcb': 60})
+    fetch = StubFetch(['first'])
+    assert rates.get('vcb', fetch) == ['first']
+    clock.advance(59)
+    assert rates.get('vcb', fetch) == ['first']
+    assert fetch.calls == 1
+    assert rates.stats['misses'] == 1 and rates.stats['hits'] == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock):
+    rates = TTLCache({'vcb': 60}, stale_ttl=600)
+    rates.get('vcb', StubFetch(['first']))
+    clock.advance(61)
+
+    gate = threading.Event()
+    fetch = StubFetch(['second'], gate=gate)
+    # Both callers get the stale value at once; only one refresh starts
+    assert rates.get('vcb', fetch) == ['first']
+    wait_until(lambda: rates.flight.in_flight('vcb'))
+    assert rates.get('vcb', fetch) == ['first']
+    assert rates.stats['stale_hits'] == 2
+
+    gate.set()
+    wait_until(lambda: rates.stats['refreshes'] == 1)
+    assert fetch.calls == 1
+    assert rates.get('vcb', fetch) == ['second']
+    assert rates.age('vcb') == 0
+
+
+def test_failed_refresh_keeps_the_stale_value(clock):
+    rates = TTLCache({'vcb': 60})
+    rates.get('vcb', StubFetch(['first']))
+    clock.advance(61)
+
+    fetch = StubFetch([])
+    assert rates.get('vcb', fetch) == ['first']
+    wait_until(lambda: fetch.calls == 1 and not rates.flight.in_flight('vcb'))
+    assert rates.peek('vcb') == ['first']
+    assert rates.stats['refreshes'] == 0
+
+
+def test_empty_results_are_not_cached(clock):
+    rates = TTLCache()
+    fetch = StubFetch([], ['rates'])
+    assert rates.get('vcb', fetch) == []
+    assert rates.peek('vcb') is None
+    assert rates.get('vcb', fetch) == ['rates']
+    assert fetch.calls == 2
+
+
+def test_expired_entry_is_fetched_again(clock):
+    rates = TTLCache({'vcb': 60}, stale_ttl=600)
+    fetch = StubFetch(['first'], ['second'])
+    rates.get('vcb', fetch)
+    clock.advance(660)
+    assert rates.get('vcb', fetch) == ['second']
+    assert rates.stats['misses'] == 2 and rates.stats['stale_hits'] == 0
+
+
+def test_expired_entries_are_evicted(clock):
+    rates = TTLCache({'vcb': 60, 'doji': 600}, stale_ttl=600)
+    rates.put('vcb', ['vcb'])
+    rates.put('doji', ['doji'])
+    clock.advance(660)
+    rates.put('agribank', ['agribank'])
+    assert rates.peek('vcb') is None
+    assert rates.peek('doji') == ['doji']
+    assert rates.stats['evictions'] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    rates = TTLCache(max_entries=2)
+    rates.put('vcb', ['vcb'])
+    clock.advance(1)
+    rates.put('doji', ['doji'])
+    clock.advance(1)
+    rates.get('vcb', StubFetch())
+    clock.advance(1)
+    rates.put('agribank', ['agribank'])
+    assert rates.peek('doji') is None
+    assert rates.peek('vcb') == ['vcb'] and rates.peek('agribank') == ['agribank']
+
+
+def test_invalidate(clock):
+    rates = TTLCache()
+    rates.put('vcb', ['vcb'])
+    rates.put('doji', ['doji'])
+    rates.invalidate('vcb')
+    assert rates.peek('vcb') is None and rates.peek('doji') == ['doji']
+    rates.invalidate()
+    assert rates.peek('doji') is None
@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from convert import RateTable, to_list
+from quotes import CurrencyQuote, GoldQuote
+
+CURRENCY_RATES = [
+    CurrencyQuote('A', 'USD', 25000.0, 25400.0),
+    CurrencyQuote('A', 'EUR', 27000.0, 28000.0),
+    CurrencyQuote('B', 'USD', 25100.0, 25500.0),
+    CurrencyQuote('B', 'EUR', 27200.0, 0.0),  # no sell side
+]
+
+GOLD_RATES = [
+    GoldQuote('gold', 'domestic', 'SJC Gold', 'Vàng SJC', 'sjc', 80000.0, 82000.0, 'VND/tael', None),
+]
+
+
+@pytest.fixture
+def table():
+    return RateTable(CURRENCY_RATES, GOLD_RATES)
+
+
+def convert_one(table, amount, source, target, bank=None):
+    results, rates = table.convert([amount], [source], [target], bank)
+    return results[0], rates[0]
+
+
+def test_best_takes_highest_bid_and_lowest_ask(table):
+    assert convert_one(table, 1, 'USD', 'VND') == (25100.0, 25100.0)
+    assert convert_one(table, 25400, 'VND', 'USD') == (1.0, 1 / 25400.0)
+    # B has no EUR sell rate, so the best ask is A's rather than NaN
+    assert convert_one(table, 28000, 'VND', 'EUR')[0] == pytest.approx(1.0)
+
+
+def test_cross_rates_go_through_vnd(table):
+    result, rate = convert_one(table, 100, 'usd', 'eur', 'A')
+    assert rate == pytest.approx(25000.0 / 28000.0)
+    assert result == pytest.approx(100 * 25000.0 / 28000.0)
+    assert convert_one(table, 100, 'EUR', 'EUR', 'A') == (100.0, 1.0)
+
+
+def test_gold_is_priced_in_vnd_per_tael(table):
+    result, _ = convert_one(table, 82_000_000, 'VND', 'GOLD:SJC', 'B')
+    assert result == pytest.approx(1.0)
+
+
+def test_missing_leg_is_nan_and_null(table):
+    results, rates = table.convert([1, 1], ['VND', 'USD'], ['EUR', 'VND'], 'B')
+    assert math.isnan(results[0]) and math.isnan(rates[0])
+    assert to_list(results) == [None, 25100.0]
+
+
+@pytest.mark.parametrize('amounts', [[float('nan')], [1e400], [[1, 2]], ['one']])
+def test_rejects_invalid_amounts(table, amounts):
+    with pytest.raises(ValueError):
+        table.convert(amounts, ['USD'] * len(amounts), ['VND'] * len(amounts))
+
+
+def test_rejects_unknown_codes_and_banks(table):
+    with pytest.raises(ValueError):
+        table.convert([1], ['XYZ'], ['VND'])
+    with pytest.raises(ValueError):
+        table.convert([1], ['USD'], ['VND'], 'nobank')
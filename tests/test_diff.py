@@ -0,0 +1,61 @@
+from diff import diff_data, diff_rows, diff_values
+from quotes import CurrencyQuote, GoldQuote
+from scraper.doji_gold import DojiFeed
+
+
+def usd(bank, buy, sell):
+    return CurrencyQuote.create(bank, 'USD', buy, sell)
+
+
+def gold(category, key, buy, sell, last_updated='08:00 17/10/2026'):
+    return GoldQuote.create('gold', category, key, key, key, buy, sell, 'VND/chi', last_updated)
+
+
+def test_added_changed_and_removed():
+    old = [usd('vcb', 25000, 25300), usd('bidv', 25010, 25310)]
+    new = [usd('vcb', 25050, 25350), usd('agribank', 25020, 25320)]
+    changes = diff_rows('banks', old, new)
+    assert [(c.kind, c.key) for c in changes] == [
+        ('changed', ('vcb', 'USD')),
+        ('added', ('agribank', 'USD')),
+        ('removed', ('bidv', 'USD')),
+    ]
+
+
+def test_same_prices_are_not_a_change():
+    old = [gold('domestic', 'SJC', 8000, 8200)]
+    new = [gold('domestic', 'SJC', 8000, 8200, last_updated='09:00 17/10/2026')]
+    assert diff_rows('doji', old, new) == []
+
+
+def test_gold_keys_repeat_across_categories():
+    old = [gold('domestic', 'SJC', 8000, 8200), gold('jewelry', 'SJC', 7900, 8100)]
+    new = [gold('domestic', 'SJC', 8000, 8200), gold('jewelry', 'SJC', 7950, 8150)]
+    changes = diff_rows('doji', old, new)
+    assert [(c.kind, c.key) for c in changes] == [('changed', ('jewelry', 'SJC'))]
+
+
+def test_as_dict_has_deltas():
+    changed, = diff_rows('vcb', [usd('vcb', 25000, 25300)], [usd('vcb', 25050.5, 25300)])
+    assert changed.as_dict() == {
+        'source': 'vcb', 'kind': 'changed', 'bank': 'vcb', 'currency': 'USD',
+        'old_buy': 25000, 'old_sell': 25300, 'buy': 25050.5, 'sell': 25300,
+        'buy_delta': 50.5, 'sell_delta': 0,
+    }
+
+    removed, = diff_rows('doji', [gold('jewelry', 'SJC', 7900, 8100)], [])
+    event = removed.as_dict()
+    assert event['kind'] == 'removed' and event['key'] == 'SJC' and event['category'] == 'jewelry'
+    assert (event['buy'], event['buy_delta'], event['sell_delta']) == (None, None, None)
+
+
+def test_diff_values_and_data():
+    feed = DojiFeed([gold('domestic', 'SJC', 8000, 8200)], [])
+    moved = DojiFeed([gold('domestic', 'SJC', 8100, 8200)], [])
+    assert diff_values('doji', feed, feed) == []
+    assert [c.kind for c in diff_values('doji', None, feed)] == ['added']
+
+    old = {'vcb': [usd('vcb', 25000, 25300)], 'doji': feed}
+    new = {'vcb': [usd('vcb', 25000, 25300)], 'doji': moved}
+    changes = diff_data(old, new)
+    assert [(c.source, c.key) for c in changes] == [('doji', ('domestic', 'SJC'))]
@@ -0,0 +1,28 @@
+from quotes import CurrencyQuote, GoldFeed, GoldQuote
+from scraper import registry
+from scraper.doji_gold import DojiFeed
+from shared_snapshot import SharedSnapshot
+
+
+def test_round_trip(tmp_path):
+    rates = [CurrencyQuote.create('vcb', 'USD', 25000.0, 25300.0)]
+    feed = DojiFeed([GoldQuote.create('gold', 'domestic', 'SJC', 'SJC', 'SJC', 8000, 8200,
+                                      'VND/chi', '08:00 17/10/2026')], [{'title': 'SJC'}])
+    shared = SharedSnapshot(str(tmp_path / 'snapshot.json'))
+    shared.write(3, 1000.0, {'vcb': rates, 'doji': feed}, {'vcb': 990.0}, {}, polled_at={'vcb': 995.0})
+
+    payload = shared.read_if_changed(force=True)
+    assert payload['version'] == 3 and payload['polled_at'] == {'vcb': 995.0}
+    assert list(payload['data']['vcb']) == rates
+    # Gold comes back as a plain GoldFeed, whatever the scraper returned
+    assert type(payload['data']['doji']) is GoldFeed
+    assert payload['data']['doji'] == feed
+    assert shared.read_if_changed(force=True) is None
+
+
+def test_currencies_come_from_the_sources():
+    currencies = registry.instruments('currency')
+    for name in registry.names('currency'):
+        assert set(registry.sources()[name].instruments) <= set(currencies)
+    assert len(currencies) == len(set(currencies))
+    assert 'domestic' not in currencies
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Start ``callers`` threads calling flight.do(key, fn) once the first is in flight"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    threads[0].start()
+    while not flight.in_flight(key):
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    return threads, results, errors
+
+
+def wait_for_waiters(flight, key, count):
+    while flight.stats[key]['coalesced'] < count:
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def fetch():
+        executions.append(1)
+        release.wait(5)
+        return ['rates']
+
+    threads, results, errors = run_concurrently(flight, 'vcb', fetch, 5)
+    wait_for_waiters(flight, 'vcb', 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert executions == [1]
+    assert results == [['rates']] * 5 and errors == []
+    assert flight.stats['vcb'] == {'executions': 1, 'coalesced': 4}
+    assert not flight.in_flight('vcb')
+
+
+def test_waiters_get_the_same_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise ConnectionError('down')
+
+    threads, results, errors = run_concurrently(flight, 'vcb', fetch, 3)
+    wait_for_waiters(flight, 'vcb', 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == []
+    assert len(errors) == 3 and all(isinstance(e, ConnectionError) for e in errors)
+
+
+def test_later_calls_run_again():
+    flight = SingleFlight()
+    assert flight.do('vcb', lambda: 1) == 1
+    with pytest.raises(ValueError):
+        flight.do('vcb', lambda: int('x'))
+    assert flight.do('vcb', lambda: 2) == 2
+    assert flight.stats['vcb'] == {'executions': 3, 'coalesced': 0}